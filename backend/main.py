@@ -27,7 +27,7 @@ from urllib.parse import urlparse, urlencode
 
 from typing import List, Optional, Any, Dict
 from pydantic import BaseModel, Field
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime, timedelta, timezone
 
 app = FastAPI(title="Person Detection API", version="1.0.0")
@@ -96,6 +96,8 @@ app.add_middleware(
 # ---- Config / Secrets --------------------------------------------------------
 DATABASE_URL = os.getenv("DATABASE_URL")  # e.g. postgresql://.../db?sslmode=require
 API_KEY = os.getenv("API_KEY", "111-1111-1-11-1-11-1-1")
+MAX_EVENT_BATCH = int(os.getenv("MAX_EVENT_BATCH", "500"))  # Max events per /events/batch request
+DB_FAST_EXECUTEMANY = os.getenv("DB_FAST_EXECUTEMANY", "true").lower() in ("1", "true", "yes")
 
 # Azure SSO Configuration
 # ... (existing config)
@@ -189,6 +191,8 @@ APP_NAME = os.getenv("APP_NAME", "FpelAICCTV Person Detection")
 # ---- DB Helper Classes -------------------------------------------------------
 class DatabaseWrapper:
     """Wrapper to make aioodbc compatible with asyncpg-style queries."""
+    _fast_executemany_warned = False
+
     def __init__(self, conn):
         self.conn = conn
 
@@ -220,6 +224,27 @@ class DatabaseWrapper:
             query = re.sub(r'\$\d+', '?', query)
             await cur.execute(query, args)
             await self.conn.commit()
+
+    async def executemany(self, query, rows):
+        """Execute a statement for many parameter rows in a single transaction."""
+        async with self.conn.cursor() as cur:
+            import re
+            query = re.sub(r'\$\d+', '?', query)
+            # Send all parameter rows in one round trip (driver support required). aioodbc has no
+            # public handle on the pyodbc cursor: _impl is it in the pinned aioodbc 0.3.3/0.5.0, and
+            # anything else falls back to plain executemany (one round trip per row)
+            raw_cursor = getattr(cur, "_impl", None)
+            if raw_cursor is not None and hasattr(raw_cursor, "fast_executemany"):
+                raw_cursor.fast_executemany = DB_FAST_EXECUTEMANY
+            elif DB_FAST_EXECUTEMANY and not DatabaseWrapper._fast_executemany_warned:
+                DatabaseWrapper._fast_executemany_warned = True
+                print("DB_FAST_EXECUTEMANY ignored: cursor exposes no pyodbc fast_executemany")
+            try:
+                await cur.executemany(query, rows)
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
             
     async def close(self):
         await self.conn.close()
@@ -332,6 +357,15 @@ async def get_or_create_sso_profile(conn: DatabaseWrapper, email: str, full_name
 
 
 # ---- DB dependency -----------------------------------------------------------
+def _is_db_unavailable(exc: Exception) -> bool:
+    """True for connectivity failures (lost link, login timeout), as opposed to a bad query."""
+    if isinstance(exc, (pyodbc.OperationalError, pyodbc.InterfaceError)):
+        return True
+    # SQLSTATE class 08 is connection exceptions, HYT00/HYT01 are timeouts
+    sqlstate = str(exc.args[0]) if isinstance(exc, pyodbc.Error) and exc.args else ""
+    return sqlstate.startswith(("08", "HYT"))
+
+
 async def get_db():
     if not DATABASE_URL:
         raise HTTPException(status_code=500, detail="DATABASE_URL is not configured")
@@ -340,6 +374,11 @@ async def get_db():
     try:
         # Connect using aioodbc
         conn = await aioodbc.connect(dsn=conn_str)
+    except Exception as e:
+        # 503 tells clients such as the detector's event spool to retry later
+        print(f"DB Connection Error: {e}")
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e}")
+    try:
         wrapper = DatabaseWrapper(conn)
         try:
             yield wrapper
@@ -347,7 +386,7 @@ async def get_db():
             await wrapper.close()
     except Exception as e:
         print(f"DB Connection Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=503 if _is_db_unavailable(e) else 500, detail=str(e))
 
 
 # ---- Auth Middleware ---------------------------------------------------------
@@ -408,6 +447,7 @@ class UserResponse(BaseModel):
 
 
 class DetectionEvent(BaseModel):
+    id: Optional[UUID] = None  # client-generated, makes /events/batch replays idempotent
     timestamp: Optional[datetime] = None  # let server default if missing
     person_id: int
     confidence: float
@@ -1042,17 +1082,182 @@ async def create_detection_event(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.post("/api/v1/events/batch")
+async def create_detection_events_batch(
+    events: List[DetectionEvent],
+    conn: DatabaseWrapper = Depends(get_db),
+    api_key_valid: bool = Depends(validate_api_key),
+    background: BackgroundTasks = None
+):
+    """
+    Create many detection events in a single transaction and return their IDs. Events that
+    carry an id already stored are skipped, so a client may safely resend a batch whose
+    response it never received.
+    """
+    if len(events) > MAX_EVENT_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_EVENT_BATCH} events")
+    if not events:
+        return {"ids": [], "count": 0}
+
+    try:
+        client_ids = list({str(event.id) for event in events if event.id is not None})
+        existing = set()
+        if client_ids:
+            placeholders = ", ".join("?" for _ in client_ids)
+            found = await conn.fetch(
+                f"SELECT id FROM dbo.detection_events WHERE id IN ({placeholders})", *client_ids
+            )
+            existing = {str(row["id"]).lower() for row in found}
+
+        rows = []
+        results = []
+        all_ids = []
+        for event in events:
+            # Server-side IDs for older clients, since OUTPUT rows are not returned from executemany
+            event_id = event.id or uuid4()
+            all_ids.append(str(event_id))
+            if str(event_id).lower() in existing:
+                continue
+            existing.add(str(event_id).lower())
+            ts = event.timestamp or datetime.now(timezone.utc)
+            try:
+                metadata_json = json.dumps(event.metadata or {})
+            except (TypeError, ValueError):
+                metadata_json = "{}"
+
+            rows.append((
+                str(event_id), ts, event.person_id, event.confidence, str(event.camera_id),
+                event.camera_name, event.image_path, event.alert_sent, metadata_json,
+                event.bbox_x1, event.bbox_y1, event.bbox_x2, event.bbox_y2,
+            ))
+            results.append({
+                "id": str(event_id),
+                "timestamp": ts.isoformat(),
+                "person_id": event.person_id,
+                "confidence": float(event.confidence),
+                "camera_id": str(event.camera_id),
+                "camera_name": event.camera_name,
+                "image_path": event.image_path,
+                "alert_sent": event.alert_sent,
+                "metadata": event.metadata or {},
+                "bbox_x1": event.bbox_x1,
+                "bbox_y1": event.bbox_y1,
+                "bbox_x2": event.bbox_x2,
+                "bbox_y2": event.bbox_y2,
+            })
+
+        if rows:
+            await conn.executemany(
+                """
+                INSERT INTO dbo.detection_events 
+                    (id, timestamp, person_id, confidence, camera_id, camera_name, image_path, alert_sent, metadata,
+                     bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+                VALUES
+                    (?, ?, ?, ?, ?, ?, ?, ?, ?,
+                     ?, ?, ?, ?)
+                """,
+                rows,
+            )
+
+        # Alerts only for newly stored events; replayed duplicates were alerted the first time
+        for result in results:
+            if background is not None:
+                background.add_task(send_alerts_background, result)
+            else:
+                import asyncio as _asyncio
+                _asyncio.create_task(send_alerts_background(result))
+
+        return {"ids": all_ids, "count": len(results)}
+
+    except Exception as e:
+        if _is_db_unavailable(e):
+            # Retryable: the detector keeps the batch spooled instead of quarantining its events
+            raise HTTPException(status_code=503, detail=f"Database unavailable: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @app.get("/api/v1/cameras")
-async def get_cameras(conn: DatabaseWrapper = Depends(get_db)):
-    """Get all cameras."""
+async def get_cameras(
+    response: Response,
+    conn: DatabaseWrapper = Depends(get_db),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """Get all cameras. Sends an ETag of the list; a matching If-None-Match gets 304 Not Modified."""
     try:
         query = """
-            SELECT id, name, rtsp_url, status, location
+            SELECT id, name, rtsp_url, status, location, detection_roi
             FROM dbo.camera_devices
             ORDER BY CASE WHEN status = 'online' THEN 1 ELSE 0 END DESC, name
         """
         rows = await conn.fetch(query)
-        return [dict(row) for row in rows]
+        cameras = []
+        for row in rows:
+            camera = dict(row)
+            roi = camera.get("detection_roi")
+            camera["detection_roi"] = json.loads(roi) if roi else None
+            cameras.append(camera)
+
+        # Derived from the content, so every worker agrees without a shared version counter
+        digest = hashlib.sha256(json.dumps(cameras, sort_keys=True, default=str).encode()).hexdigest()
+        etag = f'"{digest[:32]}"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return cameras
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _validate_detection_roi(roi):
+    """Validate a detection ROI: a rectangle {x, y, width, height} or a list of [x, y] points, all 0-1."""
+    if roi is None:
+        return None
+    if isinstance(roi, dict):
+        try:
+            values = [float(roi[key]) for key in ("x", "y", "width", "height")]
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Rectangle ROI needs numeric x, y, width and height")
+        x, y, width, height = values
+        if width <= 0 or height <= 0 or x < 0 or y < 0 or x + width > 1 or y + height > 1:
+            raise HTTPException(status_code=400, detail="Rectangle ROI must lie within 0-1 frame coordinates")
+        return {"x": x, "y": y, "width": width, "height": height}
+    if isinstance(roi, list):
+        try:
+            points = [[float(x), float(y)] for x, y in roi]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Polygon ROI must be a list of [x, y] points")
+        if len(points) < 3:
+            raise HTTPException(status_code=400, detail="Polygon ROI needs at least 3 points")
+        if any(not (0 <= v <= 1) for point in points for v in point):
+            raise HTTPException(status_code=400, detail="Polygon ROI points must be 0-1 frame coordinates")
+        return points
+    raise HTTPException(status_code=400, detail="ROI must be a rectangle object, a list of points or null")
+
+
+@app.put("/api/v1/cameras/{camera_id}/roi")
+async def update_camera_roi(
+    camera_id: str,
+    roi_data: dict,
+    conn: DatabaseWrapper = Depends(get_db),
+    api_key_valid: bool = Depends(validate_api_key)
+):
+    """Set or clear (roi: null) the camera's detection zone, in 0-1 frame coordinates."""
+    try:
+        if "roi" not in roi_data:
+            raise HTTPException(status_code=400, detail="roi is required (null clears it)")
+        roi = _validate_detection_roi(roi_data["roi"])
+
+        exists = await conn.fetchval("SELECT 1 FROM dbo.camera_devices WHERE id = ?", camera_id)
+        if not exists:
+            raise HTTPException(status_code=404, detail="Camera not found")
+
+        await conn.execute(
+            "UPDATE dbo.camera_devices SET detection_roi = ?, updated_at = SYSDATETIMEOFFSET() WHERE id = ?",
+            json.dumps(roi) if roi is not None else None, camera_id
+        )
+        return {"message": "Detection ROI updated successfully", "roi": roi}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
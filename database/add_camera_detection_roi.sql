@@ -0,0 +1,10 @@
+-- Add per-camera detection zones (ROI) to camera_devices
+-- Run this on your Azure SQL database
+
+-- JSON in 0-1 frame coordinates: a rectangle {"x": 0.1, "y": 0.2, "width": 0.5, "height": 0.6}
+-- or a polygon [[x1, y1], [x2, y2], [x3, y3], ...]; NULL means the whole frame
+IF COL_LENGTH('dbo.camera_devices', 'detection_roi') IS NULL
+BEGIN
+    ALTER TABLE dbo.camera_devices ADD detection_roi NVARCHAR(MAX) NULL;
+END;
+GO
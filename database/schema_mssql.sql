@@ -9,6 +9,7 @@ BEGIN
         rtsp_url NVARCHAR(500) NOT NULL,
         status NVARCHAR(20) DEFAULT 'offline' CHECK (status IN ('online', 'offline')),
         location NVARCHAR(200),
+        detection_roi NVARCHAR(MAX) NULL, -- JSON detection zone in 0-1 coordinates (NULL = whole frame)
         last_heartbeat DATETIMEOFFSET DEFAULT SYSDATETIMEOFFSET(),
         created_at DATETIMEOFFSET DEFAULT SYSDATETIMEOFFSET(),
         updated_at DATETIMEOFFSET DEFAULT SYSDATETIMEOFFSET()
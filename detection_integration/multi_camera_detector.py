@@ -1,44 +1,153 @@
 #!/usr/bin/env python3
 import cv2
+import numpy as np
 import asyncio
 import logging
 import threading
 import queue
 import time
-import requests
+import aiohttp
+from aiohttp import web
+import functools
+import glob
+import itertools
+import bisect
+import torch
+from concurrent.futures import Future, ThreadPoolExecutor
 from ultralytics import YOLO
+from ultralytics.engine.results import Results
 from ultralytics.nn.tasks import DetectionModel
+from ultralytics.trackers.byte_tracker import BYTETracker
+from ultralytics.utils import IterableSimpleNamespace, ops, yaml_load
+from ultralytics.utils.checks import check_yaml
 from torch.serialization import safe_globals
 from datetime import datetime
 import json
+import ast
+import shutil
+import sqlite3
+import uuid
 import os
 os.environ.setdefault("TORCH_FORCE_NO_WEIGHTS_ONLY_LOAD", "1")
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import signal
+import multiprocessing
+from multiprocessing import shared_memory
 import sys
 
 # ==================== CONFIGURATION ====================
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api/v1")
 API_KEY = os.getenv("API_KEY", "111-1111-1-11-1-11-1-1")
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))  # Pooled keep-alive connections
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "10"))  # In-flight requests across cameras
+API_TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT_SECONDS", "5"))  # Default per-call deadline
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "50"))  # Flush spooled events at this size...
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "2"))  # ...or after this many seconds
+
 IMAGES_DIR = os.getenv("IMAGES_DIR", "/absolute/path/to/shared/images")
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
+# Durable on-disk event spool (defaults to a file next to IMAGES_DIR)
+EVENT_SPOOL_PATH = os.getenv("EVENT_SPOOL_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(IMAGES_DIR)), "event_spool.db"
+)
+EVENT_SPOOL_MAX_EVENTS = int(os.getenv("EVENT_SPOOL_MAX_EVENTS", "100000"))
+# An event the backend keeps failing with another error (e.g. 500) is quarantined after this many attempts
+EVENT_MAX_ATTEMPTS = max(1, int(os.getenv("EVENT_MAX_ATTEMPTS", "5")))
+# Responses about the request or the backend, not the events in it (auth, wrong URL or route,
+# timeouts, size limits, overload): back off and resend the batch unchanged
+EVENT_RETRY_STATUSES = {401, 403, 404, 405, 408, 413, 429, 502, 503, 504}
+# Validation failures of the events themselves: the refused event is quarantined at once
+EVENT_REJECT_STATUSES = {400, 422}
+
+# Snapshot encoding (background JPEG writer pool)
+SNAPSHOT_WORKERS = int(os.getenv("SNAPSHOT_WORKERS", "2"))
+SNAPSHOT_QUEUE_SIZE = int(os.getenv("SNAPSHOT_QUEUE_SIZE", "64"))
+SNAPSHOT_JPEG_QUALITY = int(os.getenv("SNAPSHOT_JPEG_QUALITY", "85"))
+
 # Detection parameters
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.5"))
-DETECTION_WIDTH = int(os.getenv("DETECTION_WIDTH", "640"))
-DETECTION_HEIGHT = int(os.getenv("DETECTION_HEIGHT", "480"))
+# Model input size; rounded up to the network stride so frames feed the model without re-padding
+MODEL_STRIDE = 32
+DETECTION_WIDTH = -(-int(os.getenv("DETECTION_WIDTH", "640")) // MODEL_STRIDE) * MODEL_STRIDE
+DETECTION_HEIGHT = -(-int(os.getenv("DETECTION_HEIGHT", "480")) // MODEL_STRIDE) * MODEL_STRIDE
+# Candidate boxes kept for the tracker. model.track() ran NMS at 0.1 (ByteTrack's track_low_thresh)
+# so the tracker's second association can hold tracks through low-score frames; CONFIDENCE_THRESHOLD
+# is applied to the tracked boxes afterwards
+NMS_CONFIDENCE = 0.1
+NMS_IOU = 0.7
+NMS_MAX_DETECTIONS = 300
 
 # Performance tuning
 EVENT_COOLDOWN_SECONDS = float(os.getenv("EVENT_COOLDOWN_SECONDS", "5"))
 TRACK_COOLDOWN_SECONDS = float(os.getenv("TRACK_COOLDOWN_SECONDS", "30"))  # Per-track cooldown
+COOLDOWN_MAX_ENTRIES = max(1, int(os.getenv("COOLDOWN_MAX_ENTRIES", "10000")))  # Per camera and cooldown map
 FRAME_STRIDE = int(os.getenv("FRAME_STRIDE", "5"))
+# Adaptive stride: each camera moves between FRAME_STRIDE_MIN (people present) and FRAME_STRIDE_MAX
+# (empty for STRIDE_IDLE_SECONDS), and backs off while frames wait longer than INFERENCE_BACKLOG_MS
+# for an inference worker
+ADAPTIVE_STRIDE_ENABLED = os.getenv("ADAPTIVE_STRIDE_ENABLED", "true").lower() in ("1", "true", "yes")
+FRAME_STRIDE_MIN = max(1, int(os.getenv("FRAME_STRIDE_MIN", "2")))
+FRAME_STRIDE_MAX = max(FRAME_STRIDE_MIN, int(os.getenv("FRAME_STRIDE_MAX", "15")))
+STRIDE_IDLE_SECONDS = float(os.getenv("STRIDE_IDLE_SECONDS", "30"))
+INFERENCE_BACKLOG_MS = float(os.getenv("INFERENCE_BACKLOG_MS", "150"))
+STRIDE_ACTIVE_SECONDS = 2.0  # People seen this recently keep the tight stride
+TARGET_INFERENCE_FPS = float(os.getenv("TARGET_INFERENCE_FPS", "10"))  # Per-camera inference cap (0 = no cap)
 MIN_BOX_AREA = float(os.getenv("MIN_BOX_AREA", "1000"))  # Minimum bounding box area
 
+# Detection weights and runtime: pytorch, onnxruntime or openvino. Non-PyTorch runtimes use
+# a model exported once per weights/input size and cached under MODEL_CACHE_DIR
+MODEL_WEIGHTS = os.getenv("MODEL_WEIGHTS", "yolov8n.pt")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch").strip().lower()
+# fp32, or int8 for a post-training quantized model built by scripts/quantize_detector.py
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32").strip().lower()
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "model_cache"
+)
+
+# Motion gate: skip inference while a scene is static. A frame counts as motion when more than
+# MOTION_SENSITIVITY of its pixels differ from the background by MOTION_PIXEL_THRESHOLD grey levels.
+# Per-camera sensitivity via MOTION_SENSITIVITY_OVERRIDES="<camera_id>=<ratio>,..."
+MOTION_GATE_ENABLED = os.getenv("MOTION_GATE_ENABLED", "true").lower() in ("1", "true", "yes")
+MOTION_SENSITIVITY = float(os.getenv("MOTION_SENSITIVITY", "0.002"))
+MOTION_SENSITIVITY_OVERRIDES = os.getenv("MOTION_SENSITIVITY_OVERRIDES", "").strip()
+MOTION_PIXEL_THRESHOLD = int(os.getenv("MOTION_PIXEL_THRESHOLD", "25"))
+MOTION_KEEPALIVE_SECONDS = float(os.getenv("MOTION_KEEPALIVE_SECONDS", "10"))  # Forced inference interval
+MOTION_HOLD_SECONDS = float(os.getenv("MOTION_HOLD_SECONDS", "5"))  # Keep inferring after people are seen
+MOTION_FRAME_WIDTH = 160  # Width of the grayscale copy motion is measured on
+MOTION_BACKGROUND_ALPHA = 0.05
+
+# Inference worker threads sharing one model backend; any worker runs any camera's batch
+INFERENCE_WORKERS = max(1, int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1)))))
+
+# Cross-camera micro-batching
+INFERENCE_BATCH_SIZE = max(1, int(os.getenv("INFERENCE_BATCH_SIZE", "8")))
+INFERENCE_BATCH_WAIT_MS = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "10"))
+TRACKER_CONFIG = os.getenv("TRACKER_CONFIG", "bytetrack.yaml")  # Per-camera tracker settings
+
+# Multi-process sharding: split cameras across this many worker processes (1 = single process)
+SHARD_PROCESSES = max(1, int(os.getenv("SHARD_PROCESSES", "1")))
+SHARD_METRICS_INTERVAL = float(os.getenv("SHARD_METRICS_INTERVAL", "15"))  # Seconds between shard reports
+
+# Decode in separate grabber processes and hand frames over shared memory (0 = grabber threads in-process)
+GRABBER_PROCESSES = max(0, int(os.getenv("GRABBER_PROCESSES", "0")))
+SHM_RING_SLOTS = max(2, int(os.getenv("SHM_RING_SLOTS", "4")))  # Frame slots per camera ring
+SHM_FRAME_CAPACITY = int(os.getenv("SHM_MAX_FRAME_WIDTH", "1920")) * int(os.getenv("SHM_MAX_FRAME_HEIGHT", "1080")) * 3
+
+# Prometheus metrics endpoint (0 = disabled) and the window rolling FPS is measured over
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9110"))
+METRICS_FPS_WINDOW = max(2, int(os.getenv("METRICS_FPS_WINDOW", "10")))
+# Stage latency percentiles cover the last one to two windows of this many seconds
+LATENCY_WINDOW_SECONDS = float(os.getenv("LATENCY_WINDOW_SECONDS", "60"))
+
 # Camera filtering
 CAMERA_IDS = os.getenv("CAMERA_IDS", "").strip()
 INCLUDE_OFFLINE = os.getenv("INCLUDE_OFFLINE", "false").lower() in ("1", "true", "yes")
+# Seconds between conditional camera list checks that start/stop/restart changed cameras (0 = load once)
+CAMERA_RECONCILE_SECONDS = float(os.getenv("CAMERA_RECONCILE_SECONDS", "30"))
 
 # OpenCV/FFmpeg optimization options
 OPENCV_OPTIONS = os.getenv("OPENCV_FFMPEG_CAPTURE_OPTIONS", 
@@ -50,40 +159,157 @@ OPENCV_OPTIONS = os.getenv("OPENCV_FFMPEG_CAPTURE_OPTIONS",
     "reset_timestamps;1"
 )
 
+# Reduced decode for idle cameras: FFmpeg discards packets before decoding. "keyframe" decodes
+# only keyframes (about one per GOP), "full" disables it. (Discarding non-reference frames is not
+# offered: IP-camera H.264 is typically I/P only, where every frame is a reference.)
+# Cameras switch to DECODE_IDLE_MODE after DECODE_IDLE_SECONDS without people and back to full
+# decode on the next detection; KEYFRAME_ONLY_CAMERAS (comma-separated ids) always decode keyframes
+DECODE_MODES = {"full": None, "keyframe": "nonkey"}  # mode -> FFmpeg avdiscard
+DECODE_IDLE_MODE = os.getenv("DECODE_IDLE_MODE", "keyframe").strip().lower()
+DECODE_IDLE_SECONDS = float(os.getenv("DECODE_IDLE_SECONDS", "60"))
+# Minimum seconds between frames kept in keyframe mode (bounds the work on short-GOP streams)
+REDUCED_DECODE_INTERVAL = float(os.getenv("REDUCED_DECODE_INTERVAL", "1.0"))
+# Seconds a keyframe-only capture runs before its frame rate is compared with full decode
+DECODE_CHECK_SECONDS = 10
+KEYFRAME_ONLY_CAMERAS = {s.strip() for s in os.getenv("KEYFRAME_ONLY_CAMERAS", "").split(",") if s.strip()}
+if DECODE_IDLE_MODE not in DECODE_MODES:
+    raise ValueError(f"DECODE_IDLE_MODE must be one of {', '.join(DECODE_MODES)}, got {DECODE_IDLE_MODE!r}")
+
 # ==================== METRICS & LOGGING ====================
+class RollingRate:
+    """Events per second over the last window_seconds, counted in one-second buckets"""
+
+    def __init__(self, window_seconds: int = METRICS_FPS_WINDOW):
+        self.window = window_seconds
+        self._seconds = [0] * (window_seconds + 1)
+        self._counts = [0] * (window_seconds + 1)
+
+    def add(self, count: int = 1, now: Optional[float] = None):
+        second = int(time.monotonic() if now is None else now)
+        index = second % len(self._counts)
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._counts[index] = 0
+        self._counts[index] += count
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Average over the last window of completed seconds (the current one is still filling)"""
+        second = int(time.monotonic() if now is None else now)
+        total = sum(count for bucket, count in zip(self._seconds, self._counts)
+                    if second - self.window <= bucket < second)
+        return total / self.window
+
+# Pipeline stages timed per camera; end_to_end runs from frame capture to backend acknowledgement
+LATENCY_STAGES = ("decode", "letterbox", "queue_wait", "inference", "postprocess",
+                  "snapshot_write", "event_post", "end_to_end")
+LATENCY_BUCKET_BOUNDS = [1e-4 * 1.2 ** i for i in range(72)]  # 0.1 ms to ~42 s in 20% steps
+
+class LatencyHistogram:
+    """
+    Fixed log-spaced bucket histogram of durations in seconds. Recording is a bisect
+    and an increment into preallocated counts; two alternating windows keep the
+    percentiles recent without storing samples.
+    """
+
+    def __init__(self, window_seconds: float = LATENCY_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._current = [0] * (len(LATENCY_BUCKET_BOUNDS) + 1)
+        self._previous = [0] * (len(LATENCY_BUCKET_BOUNDS) + 1)
+        self._window_started = time.monotonic()
+        self.count = 0
+
+    def record(self, seconds: float):
+        now = time.monotonic()
+        if now - self._window_started >= self.window_seconds:
+            self._previous, self._current = self._current, [0] * len(self._current)
+            self._window_started = now
+        self._current[bisect.bisect_left(LATENCY_BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+
+    def percentile(self, quantile: float) -> float:
+        """Upper bound of the bucket holding the quantile over the recent windows, in seconds"""
+        counts = [a + b for a, b in zip(self._current, self._previous)]
+        total = sum(counts)
+        if not total:
+            return 0.0
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= quantile * total:
+                return LATENCY_BUCKET_BOUNDS[min(index, len(LATENCY_BUCKET_BOUNDS) - 1)]
+        return LATENCY_BUCKET_BOUNDS[-1]
+
+    def summary(self) -> dict:
+        return {
+            "p50": round(self.percentile(0.50) * 1000, 2),
+            "p95": round(self.percentile(0.95) * 1000, 2),
+            "p99": round(self.percentile(0.99) * 1000, 2),
+            "count": self.count,
+        }
+
 @dataclass
 class CameraMetrics:
     """Per-camera metrics tracking"""
     camera_id: str
     camera_name: str
     frames_processed: int = 0
+    frames_dropped: int = 0
+    frames_inferred: int = 0
+    frames_motion_skipped: int = 0
+    frame_stride: int = FRAME_STRIDE
+    decode_mode: str = "full"
+    cooldown_hits: int = 0
+    cooldown_evictions: int = 0
+    cooldown_entries: int = 0
     detections_made: int = 0
     events_logged: int = 0
+    events_failed: int = 0
+    queue_depth: int = 0
     last_frame_time: float = 0.0
     connection_attempts: int = 0
     successful_connections: int = 0
     errors: int = 0
     status: str = "offline"
+    grab_rate: RollingRate = field(default_factory=RollingRate, repr=False)
+    inference_rate: RollingRate = field(default_factory=RollingRate, repr=False)
+    latency: Dict[str, LatencyHistogram] = field(
+        default_factory=lambda: {stage: LatencyHistogram() for stage in LATENCY_STAGES}, repr=False
+    )
     
-    def fps(self, window_seconds: float = 60.0) -> float:
-        """Calculate approximate FPS over time window"""
-        if self.frames_processed == 0:
-            return 0.0
-        elapsed = time.time() - (self.last_frame_time - window_seconds)
-        return max(0.0, self.frames_processed / max(elapsed, 1.0))
+    def fps(self) -> float:
+        """Grabbed frames per second over the last METRICS_FPS_WINDOW seconds"""
+        return self.grab_rate.rate()
     
     def to_dict(self) -> dict:
         return {
             "camera_id": self.camera_id,
             "camera_name": self.camera_name,
             "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "frames_inferred": self.frames_inferred,
+            "frames_motion_skipped": self.frames_motion_skipped,
+            "motion_skip_ratio": round(
+                self.frames_motion_skipped / max(self.frames_motion_skipped + self.frames_inferred, 1), 3
+            ),
+            "frame_stride": self.frame_stride,
+            "decode_mode": self.decode_mode,
+            "reduced_decode": int(self.decode_mode != "full"),
+            "cooldown_hits": self.cooldown_hits,
+            "cooldown_evictions": self.cooldown_evictions,
+            "cooldown_entries": self.cooldown_entries,
             "detections_made": self.detections_made,
             "events_logged": self.events_logged,
+            "events_failed": self.events_failed,
             "fps": round(self.fps(), 2),
+            "fps_grabbed": round(self.fps(), 2),
+            "fps_inferred": round(self.inference_rate.rate(), 2),
+            "queue_depth": self.queue_depth,
             "connection_attempts": self.connection_attempts,
+            "reconnects": max(0, self.connection_attempts - 1),
             "successful_connections": self.successful_connections,
             "errors": self.errors,
-            "status": self.status
+            "status": self.status,
+            "latency_ms": {stage: histogram.summary() for stage, histogram in self.latency.items()},
         }
 
 def setup_logging() -> logging.Logger:
@@ -142,11 +368,600 @@ def log_with_context(logger_instance: logging.Logger, level: str, message: str,
     record.event_key = event_key
     logger_instance.handle(record)
 
+# ==================== BACKEND API CLIENT ====================
+class ApiClient:
+    """Singleton async HTTP client shared by all detector -> backend calls"""
+    _instance = None
+    _session: Optional[aiohttp.ClientSession] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the keep-alive session lazily inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=API_MAX_CONNECTIONS, keepalive_timeout=60)
+            ApiClient._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-API-Key": API_KEY},
+            )
+            ApiClient._semaphore = asyncio.Semaphore(API_MAX_CONCURRENCY)
+        return self._session
+
+    async def request(self, method: str, path: str, json_data=None, 
+                      timeout: float = API_TIMEOUT_SECONDS) -> Tuple[int, object]:
+        """Send a request to the backend API; returns (status_code, parsed JSON body or None)"""
+        session = self._get_session()
+        async with self._semaphore:
+            async with session.request(
+                method, f"{API_BASE_URL}{path}", json=json_data,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                try:
+                    body = await response.json(content_type=None)
+                except (aiohttp.ContentTypeError, ValueError):
+                    body = None
+                return response.status, body
+
+    async def conditional_get(self, path: str, etag: Optional[str] = None, 
+                              timeout: float = API_TIMEOUT_SECONDS) -> Tuple[int, object, Optional[str]]:
+        """GET with If-None-Match; returns (status_code, parsed JSON body or None, ETag); 304 means unchanged"""
+        session = self._get_session()
+        headers = {"If-None-Match": etag} if etag else None
+        async with self._semaphore:
+            async with session.get(
+                f"{API_BASE_URL}{path}", headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                body = None
+                if response.status != 304:
+                    try:
+                        body = await response.json(content_type=None)
+                    except (aiohttp.ContentTypeError, ValueError):
+                        pass
+                return response.status, body, response.headers.get("ETag")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        ApiClient._session = None
+
+# ==================== DURABLE EVENT SPOOL ====================
+class EventSpool:
+    """
+    Singleton append-only SQLite (WAL) spool for detection events. Events are
+    written here first; a background drainer ships them to POST /events/batch
+    and deletes rows only once the backend acknowledges them, so detections
+    survive backend outages and detector restarts. Each event carries its own
+    UUID, so resending a batch whose response was lost does not duplicate it,
+    and events the backend refuses are isolated by splitting the batch and moved
+    to a quarantine table instead of blocking every camera's events.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_spool()
+                    cls._instance = instance
+        return cls._instance
+
+    def _init_spool(self):
+        self.path = EVENT_SPOOL_PATH
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, camera_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quarantine ("
+            "id INTEGER PRIMARY KEY, camera_id TEXT NOT NULL, payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, status_code INTEGER, quarantined_at REAL NOT NULL)"
+        )
+        self._db_lock = threading.Lock()
+        self._metrics: Dict[str, "CameraMetrics"] = {}
+        self._captured_at: Dict[int, float] = {}  # Spool row id -> frame capture time (this run only)
+        self._attempts: Dict[int, int] = {}  # Spool row id -> failed deliveries on its own (this run only)
+        self._failed_this_drain: set = set()  # Spool row ids already counted as failed by this drain
+        self._wakeup: Optional[asyncio.Event] = None
+        self._backing_off = False
+        self._task: Optional[asyncio.Task] = None
+        self._batches_since_checkpoint = 0
+        self.events_dropped = 0
+        self.events_quarantined = 0
+        self._pending = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        if self._pending:
+            log_with_context(logger, "info", f"Replaying {self._pending} spooled events from {self.path}", 
+                           event_key="spool_replay")
+
+    def pending(self) -> int:
+        """Number of events waiting for delivery"""
+        return self._pending
+
+    def start(self):
+        """Start the background drainer (idempotent; needs a running loop)"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def append(self, event_data: dict, metrics: "CameraMetrics", captured_at: Optional[float] = None):
+        """Durably record an event; metrics are credited once the backend acknowledges it"""
+        self.start()
+        camera_id = event_data["camera_id"]
+        self._metrics[camera_id] = metrics
+        # The backend stores events under this ID, which makes replays idempotent
+        event_data = {**event_data, "id": str(uuid.uuid4())}
+        with self._db_lock:
+            row_id = self._db.execute(
+                "INSERT INTO events (camera_id, payload, created_at) VALUES (?, ?, ?)",
+                (camera_id, json.dumps(event_data), time.time()),
+            ).lastrowid
+            if captured_at is not None:
+                self._captured_at[row_id] = captured_at
+            self._pending += 1
+            overflow = self._pending - EVENT_SPOOL_MAX_EVENTS
+            if overflow > 0:
+                # Bounded disk use during long outages: shed the oldest events
+                deleted = self._db.execute(
+                    "DELETE FROM events WHERE id IN (SELECT id FROM events ORDER BY id LIMIT ?)", (overflow,)
+                ).rowcount
+                self._pending -= deleted
+                self.events_dropped += deleted
+                # Shed rows are the oldest, which come first in insertion order
+                while len(self._captured_at) > self._pending:
+                    del self._captured_at[next(iter(self._captured_at))]
+        # A full batch flushes early, but never cuts short the backoff after a failed delivery
+        if self._pending >= EVENT_BATCH_SIZE and not self._backing_off:
+            self._wakeup.set()
+
+    def _read_batch(self) -> List[Tuple[int, str, str]]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, camera_id, payload FROM events ORDER BY id LIMIT ?", (EVENT_BATCH_SIZE,)
+            ).fetchall()
+
+    def _acknowledge(self, rows: list):
+        ids = [row_id for row_id, _, _ in rows]
+        with self._db_lock:
+            self._pending -= self._db.execute(
+                f"DELETE FROM events WHERE id IN ({', '.join('?' for _ in ids)})", ids
+            ).rowcount
+            for row_id in ids:
+                self._attempts.pop(row_id, None)
+            self._batches_since_checkpoint += 1
+            if self._batches_since_checkpoint >= 100:
+                # Truncate the WAL so acknowledged pages do not accumulate on disk
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._batches_since_checkpoint = 0
+
+    def _quarantine(self, row: tuple, status_code: int):
+        """Move an event the backend will not accept out of the delivery queue, keeping it on disk"""
+        row_id, camera_id, payload = row
+        with self._db_lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT OR REPLACE INTO quarantine (id, camera_id, payload, created_at, status_code, quarantined_at) "
+                "SELECT id, camera_id, payload, created_at, ?, ? FROM events WHERE id = ?",
+                (status_code, time.time(), row_id),
+            )
+            self._pending -= self._db.execute("DELETE FROM events WHERE id = ?", (row_id,)).rowcount
+            # Bounded like the spool itself: the oldest quarantined events go first
+            self._db.execute(
+                "DELETE FROM quarantine WHERE id NOT IN (SELECT id FROM quarantine ORDER BY id DESC LIMIT ?)",
+                (EVENT_SPOOL_MAX_EVENTS,),
+            )
+            self._db.execute("COMMIT")
+        self._attempts.pop(row_id, None)
+        self._captured_at.pop(row_id, None)
+        self.events_quarantined += 1
+        self._credit([row], "errors")
+        self._credit_failed([row])
+        log_with_context(logger, "error", f"Quarantined event {row_id} after status {status_code}", 
+                       camera_id, event_key="event_quarantine")
+
+    def _record_latency(self, rows: list, post_seconds: float, acknowledged: bool):
+        """Time the batch POST per camera and, once acknowledged, each event's capture-to-ack latency"""
+        now = time.time()
+        for camera_id in {camera_id for _, camera_id, _ in rows}:
+            metrics = self._metrics.get(camera_id)
+            if metrics is not None:
+                metrics.latency["event_post"].record(post_seconds)
+        if not acknowledged:
+            return
+        for row_id, camera_id, _ in rows:
+            captured_at = self._captured_at.pop(row_id, None)
+            metrics = self._metrics.get(camera_id)
+            if captured_at is not None and metrics is not None:
+                metrics.latency["end_to_end"].record(now - captured_at)
+
+    def _credit(self, rows: list, field_name: str):
+        for _, camera_id, _ in rows:
+            metrics = self._metrics.get(camera_id)
+            if metrics is not None:
+                setattr(metrics, field_name, getattr(metrics, field_name) + 1)
+
+    def _credit_failed(self, rows: list):
+        """Count each event as failed at most once per drain, however often its batch is split"""
+        rows = [row for row in rows if row[0] not in self._failed_this_drain]
+        self._failed_this_drain.update(row_id for row_id, _, _ in rows)
+        self._credit(rows, "events_failed")
+
+    async def _run(self):
+        retry_delay = EVENT_FLUSH_INTERVAL
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), retry_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if await self.drain():
+                retry_delay = EVENT_FLUSH_INTERVAL
+                self._backing_off = False
+            else:
+                # Backend unavailable: keep events spooled and back off
+                retry_delay = min(retry_delay * 2, 60)
+                self._backing_off = True
+
+    async def drain(self) -> bool:
+        """Ship spooled events in batches; returns False if the backend did not accept them"""
+        self._failed_this_drain.clear()
+        while True:
+            rows = self._read_batch()
+            if not rows:
+                return True
+            if not await self._deliver(rows):
+                return False
+
+    async def _deliver(self, rows: list) -> bool:
+        """
+        Post rows, splitting a refused batch so the events the backend will not take are
+        isolated; returns False when delivery should back off and retry later.
+        """
+        post_started = time.monotonic()
+        try:
+            status_code, _ = await ApiClient().request(
+                "POST", "/events/batch", [json.loads(payload) for _, _, payload in rows], timeout=10
+            )
+            self._record_latency(rows, time.monotonic() - post_started, status_code == 200)
+        except Exception as e:
+            self._credit_failed(rows)
+            log_with_context(logger, "error", f"Error posting event batch: {e}", event_key="event_error")
+            return False
+
+        if status_code == 200:
+            self._acknowledge(rows)
+            self._credit(rows, "events_logged")
+            log_with_context(logger, "info", f"Logged {len(rows)} events", event_key="event_log")
+            return True
+
+        self._credit_failed(rows)
+        if status_code in EVENT_RETRY_STATUSES:
+            # Misconfiguration, or backend or database unavailable: nothing wrong with the events themselves
+            log_with_context(logger, "error", f"Failed to log {len(rows)} events: {status_code}", 
+                           event_key="event_error")
+            return False
+        if len(rows) > 1:
+            middle = len(rows) // 2
+            return await self._deliver(rows[:middle]) and await self._deliver(rows[middle:])
+
+        # A single event the backend refuses: validation errors never succeed, other errors
+        # (e.g. its camera was deleted) get a few attempts before it stops blocking the spool
+        row_id = rows[0][0]
+        self._attempts[row_id] = self._attempts.get(row_id, 0) + 1
+        if status_code in EVENT_REJECT_STATUSES or self._attempts[row_id] >= EVENT_MAX_ATTEMPTS:
+            self._quarantine(rows[0], status_code)
+            return True
+        log_with_context(logger, "error", 
+                       f"Event {row_id} failed with {status_code} (attempt {self._attempts[row_id]}/{EVENT_MAX_ATTEMPTS})", 
+                       event_key="event_error")
+        return False
+
+    async def stop(self):
+        """Stop the drainer after one last attempt; undelivered events stay on disk"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.drain()
+        with self._db_lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def spool_path(shard_index: Optional[int] = None) -> str:
+    """Spool file of a shard, or of the single-process detector"""
+    if shard_index is None:
+        return EVENT_SPOOL_PATH
+    root, ext = os.path.splitext(EVENT_SPOOL_PATH)
+    return f"{root}.shard{shard_index}{ext}"
+
+def adopt_orphaned_spools(shards: int):
+    """
+    Move events left in spool files this run will not open (after SHARD_PROCESSES changed)
+    into the first active spool, so they are still delivered. Runs in the parent before
+    any spool is opened.
+    """
+    root, ext = os.path.splitext(EVENT_SPOOL_PATH)
+    active = [spool_path()] if shards <= 1 else [spool_path(i) for i in range(shards)]
+    candidates = [spool_path()] + glob.glob(f"{glob.escape(root)}.shard*{ext}")
+    orphans = [path for path in candidates if path not in active and os.path.exists(path)]
+    if not orphans:
+        return
+
+    target = sqlite3.connect(active[0], isolation_level=None)
+    try:
+        target.execute("PRAGMA journal_mode=WAL")
+        target.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, camera_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        target.execute(
+            "CREATE TABLE IF NOT EXISTS quarantine ("
+            "id INTEGER PRIMARY KEY, camera_id TEXT NOT NULL, payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, status_code INTEGER, quarantined_at REAL NOT NULL)"
+        )
+        for path in orphans:
+            # Closing the only connection checkpoints the orphan's WAL into its main file
+            sqlite3.connect(path).close()
+            target.execute("ATTACH DATABASE ? AS orphan", (path,))
+            tables = {row[0] for row in target.execute("SELECT name FROM orphan.sqlite_master WHERE type = 'table'")}
+            target.execute("BEGIN")
+            moved = 0
+            if "events" in tables:
+                moved = target.execute(
+                    "INSERT INTO events (camera_id, payload, created_at) "
+                    "SELECT camera_id, payload, created_at FROM orphan.events ORDER BY id"
+                ).rowcount
+            if "quarantine" in tables:
+                target.execute(
+                    "INSERT INTO quarantine (camera_id, payload, created_at, status_code, quarantined_at) "
+                    "SELECT camera_id, payload, created_at, status_code, quarantined_at FROM orphan.quarantine"
+                )
+            target.execute("COMMIT")
+            target.execute("DETACH DATABASE orphan")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            log_with_context(logger, "info", f"Moved {moved} spooled events from {path} to {active[0]}", 
+                           event_key="spool_adopt")
+    finally:
+        target.close()
+
+# ==================== SNAPSHOT WRITER ====================
+class SnapshotWriter:
+    """
+    Singleton pool of encoder threads that JPEG-encode and write snapshots from a
+    bounded queue (OpenCV releases the GIL while encoding). When the queue is full
+    the snapshot is dropped instead of stalling inference.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_writer()
+                    cls._instance = instance
+        return cls._instance
+
+    def _init_writer(self):
+        self._queue: "queue.Queue" = queue.Queue(maxsize=SNAPSHOT_QUEUE_SIZE)
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, SNAPSHOT_JPEG_QUALITY]
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"snapshot-{i}", daemon=True)
+            for i in range(max(1, SNAPSHOT_WORKERS))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, filename: str, image, histogram: Optional["LatencyHistogram"] = None) -> Future:
+        """Queue an image for writing; the future resolves to the filename, or None if not written"""
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((filename, image, future, histogram))
+        except queue.Full:
+            self.dropped += 1
+            future.set_result(None)
+        return future
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            filename, image, future, histogram = item
+            try:
+                started = time.monotonic()
+                written = cv2.imwrite(os.path.join(IMAGES_DIR, filename), image, self._params)
+                if histogram is not None:
+                    histogram.record(time.monotonic() - started)
+                if written:
+                    self.written += 1
+                    future.set_result(filename)
+                else:
+                    self.failed += 1
+                    future.set_result(None)
+            except Exception as e:
+                self.failed += 1
+                log_with_context(logger, "error", f"Failed to save image {filename}: {e}", 
+                               event_key="snapshot_error")
+                future.set_result(None)
+
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "backlog": self.backlog(),
+        }
+
+    def stop(self, timeout: float = 5.0):
+        """Finish queued snapshots and stop the encoder threads"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+# ==================== INFERENCE BACKENDS ====================
+def load_detection_weights() -> YOLO:
+    """Load the PyTorch detection weights (also the source for exported artifacts)"""
+    with safe_globals([DetectionModel]):
+        return YOLO(MODEL_WEIGHTS)
+
+def exported_model_path(backend: str, precision: str = "fp32") -> str:
+    """Cache location of a backend's exported model, keyed by weights and input size"""
+    stem = os.path.splitext(os.path.basename(MODEL_WEIGHTS))[0]
+    if precision == "int8":
+        # A QDQ ONNX model, which ONNX Runtime and OpenVINO both execute in INT8
+        suffix = "_int8.onnx"
+    else:
+        suffix = {"onnxruntime": ".onnx", "openvino": "_openvino_model"}[backend]
+    return os.path.join(MODEL_CACHE_DIR, f"{stem}_{DETECTION_HEIGHT}x{DETECTION_WIDTH}{suffix}")
+
+def resolve_model_artifact(backend: str) -> str:
+    """Model file the configured MODEL_PRECISION runs on for this backend"""
+    if MODEL_PRECISION == "int8":
+        path = exported_model_path(backend, "int8")
+        if not os.path.exists(path):
+            raise RuntimeError(f"MODEL_PRECISION=int8 but {path} does not exist; "
+                               f"build it with scripts/quantize_detector.py")
+        return path
+    return ensure_exported_model(backend)
+
+def onnx_class_names(path: str) -> Dict[int, str]:
+    """Class names ultralytics stores in an exported ONNX model's metadata"""
+    import onnx
+    metadata = {prop.key: prop.value for prop in onnx.load(path, load_external_data=False).metadata_props}
+    return ast.literal_eval(metadata["names"])
+
+def ensure_exported_model(backend: str) -> str:
+    """Export the weights for a runtime on first use and return the cached artifact"""
+    path = exported_model_path(backend)
+    if os.path.exists(path):
+        return path
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    log_with_context(logger, "info", f"Exporting {MODEL_WEIGHTS} for {backend} to {path}", event_key="model_export")
+    exported = load_detection_weights().export(
+        format="onnx" if backend == "onnxruntime" else "openvino",
+        imgsz=[DETECTION_HEIGHT, DETECTION_WIDTH],
+        dynamic=True,  # Batch size follows whatever the batcher collects
+    )
+    shutil.move(exported, path)
+    return path
+
+class InferenceBackend:
+    """
+    Common runtime interface: forward() takes a letterboxed NCHW float batch and returns
+    raw (batch, 4 + classes, anchors) predictions, so NMS, Results and tracking are
+    shared by every backend. Implementations must allow concurrent forward() calls.
+    """
+    name = "base"
+    names: Dict[int, str] = {}
+
+    def forward(self, batch: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+class TorchBackend(InferenceBackend):
+    name = "pytorch"
+
+    def __init__(self, threads: int, path: Optional[str] = None):
+        if MODEL_PRECISION != "fp32":
+            raise ValueError("MODEL_PRECISION=int8 needs INFERENCE_BACKEND=onnxruntime or openvino")
+        # Split CPU cores between workers instead of oversubscribing them
+        torch.set_num_threads(max(1, threads // INFERENCE_WORKERS))
+        model = load_detection_weights()
+        # Fuse once up front; workers then only run forward passes on the shared weights
+        model.fuse()
+        self.model = model.model.eval()
+        self.names = model.names
+
+    def forward(self, batch: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            predictions = self.model(batch)
+        return predictions[0] if isinstance(predictions, (list, tuple)) else predictions
+
+class OnnxRuntimeBackend(InferenceBackend):
+    name = "onnxruntime"
+
+    def __init__(self, threads: int, path: Optional[str] = None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError("INFERENCE_BACKEND=onnxruntime requires the onnxruntime package") from e
+        path = path or resolve_model_artifact(self.name)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads  # One pool shared by all concurrent runs
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.names = ast.literal_eval(self.session.get_modelmeta().custom_metadata_map["names"])
+
+    def forward(self, batch: torch.Tensor) -> torch.Tensor:
+        return torch.from_numpy(self.session.run(None, {self.input_name: batch.numpy()})[0])
+
+class OpenVinoBackend(InferenceBackend):
+    name = "openvino"
+
+    def __init__(self, threads: int, path: Optional[str] = None):
+        try:
+            from openvino.runtime import Core
+        except ImportError as e:
+            raise RuntimeError("INFERENCE_BACKEND=openvino requires the openvino package") from e
+        path = path or resolve_model_artifact(self.name)
+        if path.endswith(".onnx"):
+            model_file, self.names = path, onnx_class_names(path)
+        else:
+            stem = os.path.splitext(os.path.basename(MODEL_WEIGHTS))[0]
+            model_file = os.path.join(path, f"{stem}.xml")
+            self.names = yaml_load(os.path.join(path, "metadata.yaml"))["names"]
+        core = Core()
+        # One stream per inference worker so concurrent batches do not queue behind each other
+        self.compiled = core.compile_model(
+            core.read_model(model_file), "CPU",
+            {"INFERENCE_NUM_THREADS": str(threads), "NUM_STREAMS": str(INFERENCE_WORKERS)},
+        )
+        self._output = self.compiled.output(0)
+        self._local = threading.local()
+
+    def forward(self, batch: torch.Tensor) -> torch.Tensor:
+        request = getattr(self._local, "request", None)
+        if request is None:
+            request = self._local.request = self.compiled.create_infer_request()
+        # The output buffer belongs to this thread's request; NMS copies what it keeps
+        return torch.from_numpy(request.infer({0: batch.numpy()})[self._output])
+
+INFERENCE_BACKENDS = {
+    backend.name: backend for backend in (TorchBackend, OnnxRuntimeBackend, OpenVinoBackend)
+}
+
 # ==================== SHARED MODEL MANAGER ====================
 class ModelManager:
-    """Singleton YOLO model manager to share model across cameras"""
+    """Singleton model manager: the inference backend is loaded once and shared read-only across workers"""
     _instance = None
-    _model = None
+    _backend = None
+    _executor = None
+    _batcher = None
     _lock = threading.Lock()
     
     def __new__(cls):
@@ -156,16 +971,303 @@ class ModelManager:
                     cls._instance = super().__new__(cls)
         return cls._instance
     
-    def get_model(self) -> YOLO:
-        """Get or create the shared YOLO model"""
-        if self._model is None:
+    def get_backend(self) -> InferenceBackend:
+        """Get or create the shared inference backend"""
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend_cls = INFERENCE_BACKENDS.get(INFERENCE_BACKEND)
+                    if backend_cls is None:
+                        raise ValueError(f"Unknown INFERENCE_BACKEND {INFERENCE_BACKEND!r}; "
+                                         f"expected one of {', '.join(INFERENCE_BACKENDS)}")
+                    log_with_context(logger, "info", f"Loading {MODEL_WEIGHTS} ({MODEL_PRECISION}) on {backend_cls.name}", 
+                                   event_key="model_init")
+                    # Split CPU cores between shards instead of oversubscribing them
+                    ModelManager._backend = backend_cls(max(1, (os.cpu_count() or 1) // SHARD_PROCESSES))
+                    log_with_context(logger, "info", "Detection model loaded successfully", event_key="model_init")
+        return self._backend
+
+    def get_executor(self) -> "InferenceExecutor":
+        """Get or create the shared inference worker pool"""
+        if self._executor is None:
             with self._lock:
-                if self._model is None:
-                    log_with_context(logger, "info", "Loading YOLO model (yolov8n.pt)", event_key="model_init")
-                    with safe_globals([DetectionModel]):
-                        self._model = YOLO('yolov8n.pt')
-                    log_with_context(logger, "info", "YOLO model loaded successfully", event_key="model_init")
-        return self._model
+                if self._executor is None:
+                    ModelManager._executor = InferenceExecutor(self, INFERENCE_WORKERS)
+        return self._executor
+
+    def get_batcher(self) -> "InferenceBatcher":
+        """Get or create the cross-camera batching service"""
+        if self._batcher is None:
+            executor = self.get_executor()
+            with self._lock:
+                if self._batcher is None:
+                    ModelManager._batcher = InferenceBatcher(
+                        executor, INFERENCE_BATCH_SIZE, INFERENCE_BATCH_WAIT_MS
+                    )
+        return self._batcher
+
+    def shutdown(self):
+        """Stop the batching service and inference worker pool"""
+        with self._lock:
+            if self._batcher is not None:
+                self._batcher.stop()
+                ModelManager._batcher = None
+            if self._executor is not None:
+                self._executor.shutdown()
+                ModelManager._executor = None
+
+# ==================== PER-CAMERA TRACKING ====================
+class CameraByteTracker(BYTETracker):
+    """
+    BYTETracker numbering tracks from its camera's own counter. Upstream tracks draw IDs
+    from the class-level BaseTrack._count, which every new tracker resets for all cameras.
+    """
+
+    def __init__(self, args, track_ids: Iterator[int], frame_rate: int = 30):
+        self._track_ids = track_ids
+        super().__init__(args=args, frame_rate=frame_rate)
+
+    def reset_id(self):
+        """Leave the shared counter alone; IDs continue from the camera's counter"""
+
+    def init_track(self, *args, **kwargs):
+        tracks = super().init_track(*args, **kwargs)
+        for track in tracks:
+            # STrack.activate() assigns self.next_id(); route it to this camera's counter
+            track.next_id = self._track_ids.__next__
+        return tracks
+
+class CameraTracker:
+    """ByteTrack state owned by a single camera (mirrors ultralytics' track callbacks)"""
+    _cfg = None
+
+    def __init__(self, track_ids: Optional[Iterator[int]] = None, frame_rate: int = 30):
+        if CameraTracker._cfg is None:
+            CameraTracker._cfg = IterableSimpleNamespace(**yaml_load(check_yaml(TRACKER_CONFIG)))
+        track_ids = track_ids if track_ids is not None else itertools.count(1)
+        self._tracker = CameraByteTracker(self._cfg, track_ids, frame_rate=frame_rate)
+
+    def update(self, result):
+        """Attach track IDs to a single-frame detection result"""
+        det = result.boxes.cpu().numpy()
+        if len(det) == 0:
+            return result
+        tracks = self._tracker.update(det, result.orig_img)
+        if len(tracks) == 0:
+            return result
+        idx = tracks[:, -1].astype(int)
+        result = result[idx]
+        result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+        return result
+
+# ==================== INFERENCE WORKER POOL ====================
+class FrameTensorizer:
+    """
+    Packs letterboxed BGR canvases into the model's input tensor: BGR->RGB, HWC->CHW and
+    scaling to 0-1 happen in a single pass per frame, written straight into a reused
+    contiguous NCHW float32 buffer.
+    """
+
+    def __init__(self, height: int, width: int, max_batch: int):
+        self.height = height
+        self.width = width
+        self._allocate(max(1, max_batch))
+
+    def _allocate(self, batch: int):
+        self._tensor = torch.empty((batch, 3, self.height, self.width), dtype=torch.float32)
+        self._array = self._tensor.numpy()
+
+    def __call__(self, frames: list) -> torch.Tensor:
+        if len(frames) > self._tensor.shape[0]:
+            self._allocate(len(frames))
+        for index, frame in enumerate(frames):
+            if frame.shape != (self.height, self.width, 3):
+                raise ValueError(f"Frame shape {frame.shape} does not match model input {self.height}x{self.width}")
+            np.multiply(frame.transpose(2, 0, 1)[::-1], 1.0 / 255.0,
+                        out=self._array[index], casting="unsafe")
+        return self._tensor[:len(frames)]
+
+class InferenceExecutor:
+    """
+    Runs model inference on dedicated worker threads so the asyncio loop stays responsive.
+    Frames arrive already letterboxed to the model input size, so workers skip the
+    ultralytics predictor: each packs its batch into its own input buffer and runs the
+    shared backend plus NMS directly. Tracking state lives with the camera, so any
+    worker can serve any camera.
+    """
+
+    def __init__(self, model_manager: ModelManager, workers: int):
+        self.model_manager = model_manager
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._local = threading.local()
+        self.queue_delay = 0.0  # Smoothed seconds frames wait before a worker starts on them
+        log_with_context(logger, "info", f"Inference pool started with {self.workers} workers", event_key="inference_pool")
+
+    @property
+    def overloaded(self) -> bool:
+        """True while frames wait longer than INFERENCE_BACKLOG_MS for a worker"""
+        return self.queue_delay * 1000.0 > INFERENCE_BACKLOG_MS
+
+    def _tensorizer(self) -> FrameTensorizer:
+        tensorizer = getattr(self._local, "tensorizer", None)
+        if tensorizer is None:
+            tensorizer = self._local.tensorizer = FrameTensorizer(
+                DETECTION_HEIGHT, DETECTION_WIDTH, INFERENCE_BATCH_SIZE
+            )
+        return tensorizer
+
+    def _detect(self, frames: list) -> list:
+        backend = self.model_manager.get_backend()
+        predictions = backend.forward(self._tensorizer()(frames))
+        with torch.inference_mode():
+            detections = ops.non_max_suppression(
+                predictions, NMS_CONFIDENCE, NMS_IOU, max_det=NMS_MAX_DETECTIONS
+            )
+        # Boxes are already in letterboxed-frame coordinates; unletterbox_bbox maps them back
+        return [
+            Results(frame, path="", names=backend.names, boxes=boxes)
+            for frame, boxes in zip(frames, detections)
+        ]
+
+    def _predict(self, frames: list, trackers: list, submitted_at: float, validators: Optional[list] = None):
+        self.queue_delay += 0.2 * ((time.monotonic() - submitted_at) - self.queue_delay)
+        if validators is None:
+            results = self._detect(frames)
+            return [tracker.update(result) for tracker, result in zip(trackers, results)]
+
+        # Shared-memory frames may be overwritten by their grabber at any time: skip those already
+        # replaced, and keep frames replaced while being packed away from their tracker
+        results = [None] * len(frames)
+        keep = [i for i, valid in enumerate(validators) if valid is None or valid()]
+        if keep:
+            detections = self._detect([frames[i] for i in keep])
+            for i, result in zip(keep, detections):
+                if validators[i] is None or validators[i]():
+                    results[i] = trackers[i].update(result)
+        return results
+
+    async def predict_batch(self, frames: list, trackers: list, submitted_at: Optional[float] = None, 
+                            validators: Optional[list] = None):
+        """
+        Run one batched forward pass, then update each frame's camera tracker. validators
+        optionally holds a still_valid() check per frame; frames failing it get None.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, self._predict, frames, trackers, submitted_at or time.monotonic(), validators
+        )
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        log_with_context(logger, "info", "Inference pool stopped", event_key="inference_pool")
+
+class InferenceBatcher:
+    """
+    Collects letterboxed frames from all cameras into micro-batches bounded by
+    max_batch and max_wait_ms, runs one forward pass per batch and resolves each
+    camera's future with its own tracked result.
+    """
+
+    def __init__(self, executor: InferenceExecutor, max_batch: int, max_wait_ms: float):
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.batches_run = 0
+        self.frames_batched = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dispatches: set = set()
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            # One batch in flight per worker; the next batch forms while they run
+            self._inflight = asyncio.Semaphore(self.executor.workers)
+            self._task = asyncio.create_task(self._collect())
+            log_with_context(logger, "info", 
+                           f"Inference batching started (max_batch={self.max_batch}, max_wait={self.max_wait * 1000:.0f}ms)", 
+                           event_key="inference_batch")
+
+    async def submit(self, frame, tracker: CameraTracker, still_valid=None):
+        """Submit a camera frame and wait for its tracked detection results ([None] if the frame was overwritten)"""
+        if self.max_batch <= 1:
+            results = await self.executor.predict_batch(
+                [frame], [tracker], validators=[still_valid] if still_valid is not None else None
+            )
+            return results[:1]
+
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((frame, tracker, future, time.monotonic(), still_valid))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                # Take everything already waiting before paying for a timed wait
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Drop frames whose camera stopped waiting
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+
+            await self._inflight.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list):
+        try:
+            validators = [item[4] for item in batch]
+            results = await self.executor.predict_batch(
+                [item[0] for item in batch], [item[1] for item in batch],
+                submitted_at=min(item[3] for item in batch),
+                validators=validators if any(v is not None for v in validators) else None,
+            )
+            self.batches_run += 1
+            self.frames_batched += len(batch)
+            for (_, _, future, _, _), result in zip(batch, results):
+                if not future.done():
+                    # Same shape as model.track() output for a single frame
+                    future.set_result([result])
+        except Exception as e:
+            for _, _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._inflight.release()
+
+    def queue_depth(self) -> int:
+        """Frames submitted and not yet handed to a worker"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._dispatches):
+            task.cancel()
+        if self.batches_run:
+            log_with_context(logger, "info", 
+                           f"Inference batching stopped (avg batch {self.frames_batched / self.batches_run:.2f})", 
+                           event_key="inference_batch")
 
 # ==================== ASPECT RATIO PRESERVING DETECTION ====================
 def calculate_letterbox_params(src_width: int, src_height: int, 
@@ -212,44 +1314,715 @@ def letterbox_frame(frame, target_width: int, target_height: int):
     
     return letterboxed, scale, pad_x, pad_y
 
-def unletterbox_bbox(bbox: List[float], scale: float, pad_x: int, pad_y: int) -> List[float]:
-    """Convert letterboxed bbox back to original coordinates"""
+def parse_roi(roi) -> Optional[np.ndarray]:
+    """
+    Normalize a camera's detection ROI into polygon points in 0-1 frame coordinates.
+    Accepts a rectangle {"x", "y", "width", "height"} or a list of [x, y] points, either
+    as JSON text (as stored in dbo.camera_devices) or already decoded.
+    """
+    if isinstance(roi, str):
+        roi = json.loads(roi) if roi.strip() else None
+    if not roi:
+        return None
+    if isinstance(roi, dict):
+        x, y, width, height = (float(roi[key]) for key in ("x", "y", "width", "height"))
+        roi = [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+    points = np.clip(np.asarray(roi, dtype=np.float32).reshape(-1, 2), 0.0, 1.0)
+    if len(points) < 3 or np.ptp(points[:, 0]) <= 0 or np.ptp(points[:, 1]) <= 0:
+        raise ValueError(f"ROI needs at least 3 points spanning a non-empty area: {roi}")
+    return points
+
+class Letterboxer:
+    """
+    Per-camera letterboxer that resizes straight into preallocated padded canvases.
+    Geometry is recomputed only when the source resolution changes, and a canvas is
+    reused only after its consumer hands it back through release(), and only if it was
+    filled with the current geometry (each change starts a new generation). With an ROI only
+    its bounding box is resized (offset gives its origin in the frame) and, for
+    polygons, pixels outside the polygon are painted with the padding colour.
+    """
+
+    def __init__(self, target_width: int, target_height: int, roi: Optional[np.ndarray] = None):
+        self.target_width = target_width
+        self.target_height = target_height
+        self.roi = roi
+        self.params: Optional[Tuple[int, int, int, int, float]] = None
+        self.offset: Tuple[int, int] = (0, 0)
+        self._crop: Optional[Tuple[int, int, int, int]] = None
+        self._outside: Optional[np.ndarray] = None
+        self._source_shape: Optional[Tuple[int, int]] = None
+        self._free: List[np.ndarray] = []
+        self._generation = 0
+        self._issued: Dict[int, int] = {}  # id(canvas) -> generation of the geometry it was filled with
+        self._lock = threading.Lock()
+
+    def _new_canvas(self) -> np.ndarray:
+        return np.full((self.target_height, self.target_width, 3), 114, dtype=np.uint8)
+
+    @staticmethod
+    def _is_rectangle(points: np.ndarray) -> bool:
+        """True when the ROI is its own bounding box, so cropping alone is exact"""
+        (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+        corners = {(x0, y0), (x1, y0), (x1, y1), (x0, y1)}
+        return len(points) == 4 and {tuple(point) for point in points} == corners
+
+    def _configure(self, src_width: int, src_height: int):
+        """Recompute crop, letterbox geometry and polygon mask for a new source resolution"""
+        self._crop, self._outside, self.offset = None, None, (0, 0)
+        crop_width, crop_height = src_width, src_height
+        if self.roi is not None:
+            points = self.roi * np.array([src_width, src_height], dtype=np.float32)
+            x0, y0 = np.floor(points.min(axis=0)).astype(int)
+            x1, y1 = np.ceil(points.max(axis=0)).astype(int)
+            x1, y1 = max(x1, x0 + 1), max(y1, y0 + 1)
+            self._crop = (x0, y0, x1, y1)
+            self.offset = (int(x0), int(y0))
+            crop_width, crop_height = x1 - x0, y1 - y0
+
+        self.params = calculate_letterbox_params(
+            crop_width, crop_height, self.target_width, self.target_height
+        )
+
+        if self.roi is not None and not self._is_rectangle(self.roi):
+            _, _, pad_x, pad_y, scale = self.params
+            canvas_points = (points - np.array(self.offset)) * scale + np.array([pad_x, pad_y])
+            mask = np.zeros((self.target_height, self.target_width), dtype=np.uint8)
+            cv2.fillPoly(mask, [np.round(canvas_points).astype(np.int32)], 255)
+            self._outside = (mask == 0)[..., None]
+
+    def letterbox(self, frame) -> Tuple[np.ndarray, float, int, int]:
+        """Letterbox a frame into a free canvas; returns (canvas, scale, pad_x, pad_y)"""
+        src_height, src_width = frame.shape[:2]
+        with self._lock:
+            if self._source_shape != (src_height, src_width):
+                # New geometry: old canvases may have content where padding now goes
+                self._source_shape = (src_height, src_width)
+                self._configure(src_width, src_height)
+                self._generation += 1
+                self._free.clear()
+            canvas = self._free.pop() if self._free else self._new_canvas()
+            self._issued[id(canvas)] = self._generation
+
+        if self._crop is not None:
+            x0, y0, x1, y1 = self._crop
+            frame = frame[y0:y1, x0:x1]
+        new_width, new_height, pad_x, pad_y, scale = self.params
+        view = canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        resized = cv2.resize(frame, (new_width, new_height), dst=view)
+        if resized.__array_interface__['data'][0] != view.__array_interface__['data'][0]:
+            # OpenCV could not write in place (e.g. unexpected layout); copy once instead
+            np.copyto(view, resized)
+        if self._outside is not None:
+            np.copyto(canvas, np.uint8(114), where=self._outside)
+        return canvas, scale, pad_x, pad_y
+
+    def release(self, canvas: np.ndarray):
+        """Return a canvas once nothing reads it anymore"""
+        with self._lock:
+            # Canvases filled before a resolution change hold old pixels where padding now goes
+            if self._issued.pop(id(canvas), None) == self._generation and len(self._free) < 4:
+                self._free.append(canvas)
+
+def release_frame(frame_info: Optional[dict]):
+    """Hand a frame's pooled buffers back to their owner, if it has any"""
+    if frame_info is not None:
+        release = frame_info.pop('release', None)
+        if release is not None:
+            release()
+
+def unletterbox_bbox(bbox: List[float], scale: float, pad_x: int, pad_y: int, 
+                     offset_x: int = 0, offset_y: int = 0) -> List[float]:
+    """Convert letterboxed bbox back to original coordinates (offset = ROI origin in the frame)"""
     x1, y1, x2, y2 = bbox
-    # Remove padding and scale back
-    x1 = (x1 - pad_x) / scale
-    y1 = (y1 - pad_y) / scale
-    x2 = (x2 - pad_x) / scale
-    y2 = (y2 - pad_y) / scale
+    # Remove padding, scale back and shift by the ROI crop origin
+    x1 = (x1 - pad_x) / scale + offset_x
+    y1 = (y1 - pad_y) / scale + offset_y
+    x2 = (x2 - pad_x) / scale + offset_x
+    y2 = (y2 - pad_y) / scale + offset_y
     return [x1, y1, x2, y2]
 
+def unletterbox_boxes(boxes: np.ndarray, scale: float, pad_x: int, pad_y: int, 
+                      offset_x: int = 0, offset_y: int = 0) -> np.ndarray:
+    """Vectorized unletterbox_bbox for an (N, 4) array of x1, y1, x2, y2 boxes"""
+    padding = np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)
+    offset = np.array([offset_x, offset_y, offset_x, offset_y], dtype=np.float32)
+    return (boxes - padding) / scale + offset
+
+# ==================== MOTION GATE ====================
+class MotionGate:
+    """
+    Cheap per-camera pre-filter run before inference: a small blurred grayscale copy of
+    each frame is compared with a running-average background. Frames go to the model
+    only when enough pixels changed, people were seen recently, or the keep-alive is due.
+    """
+
+    def __init__(self, sensitivity: float, keepalive_seconds: float = MOTION_KEEPALIVE_SECONDS,
+                 hold_seconds: float = MOTION_HOLD_SECONDS):
+        self.sensitivity = sensitivity  # Fraction of pixels that must change to count as motion
+        self.keepalive_seconds = keepalive_seconds
+        self.hold_seconds = hold_seconds
+        self._background: Optional[np.ndarray] = None
+        self._last_inference = 0.0
+        self._active_until = 0.0
+
+    def _changed_ratio(self, frame) -> float:
+        height = max(1, round(frame.shape[0] * MOTION_FRAME_WIDTH / frame.shape[1]))
+        small = cv2.resize(frame, (MOTION_FRAME_WIDTH, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            return 1.0
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        # Slowly absorb lighting changes and parked objects into the background
+        cv2.accumulateWeighted(gray, self._background, MOTION_BACKGROUND_ALPHA)
+        _, mask = cv2.threshold(diff, MOTION_PIXEL_THRESHOLD, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def should_infer(self, frame, now: float) -> bool:
+        """Decide whether this frame is worth a forward pass"""
+        moving = self._changed_ratio(frame) >= self.sensitivity
+        if moving or now < self._active_until or now - self._last_inference >= self.keepalive_seconds:
+            self._last_inference = now
+            return True
+        return False
+
+    def mark_activity(self, now: float):
+        """Keep inferring for a while after people were detected, even if they stand still"""
+        self._active_until = now + self.hold_seconds
+
+# ==================== LATEST-FRAME MAILBOX ====================
+class FrameMailbox:
+    """
+    Single-slot, lock-protected handoff between the grabber thread and inference.
+    A new frame overwrites an unconsumed one, so inference always sees the freshest
+    frame and a camera holds at most the slot plus the frame being processed.
+    The grabber wakes the consumer's event loop through call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame_info: Optional[dict] = None
+        self.sequence = 0
+        self.frames_dropped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._closed = False
+
+    def open(self, loop: asyncio.AbstractEventLoop):
+        """Bind the mailbox to the event loop that consumes it"""
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def close(self):
+        """Wake any waiting consumer so it can observe shutdown"""
+        self._closed = True
+        self._notify()
+
+    def _notify(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def put(self, frame_info: dict) -> int:
+        """Publish a frame, replacing any unconsumed one; returns its sequence number"""
+        with self._lock:
+            replaced = self._frame_info
+            was_empty = replaced is None
+            if not was_empty:
+                self.frames_dropped += 1
+            self.sequence += 1
+            frame_info['sequence'] = self.sequence
+            frame_info['published_at'] = time.monotonic()
+            self._frame_info = frame_info
+        release_frame(replaced)
+        # Only the empty -> full transition needs a wakeup; otherwise one is already pending
+        if was_empty:
+            self._notify()
+        return self.sequence
+
+    async def get(self) -> Optional[dict]:
+        """Wait for the next frame; returns None once the mailbox is closed"""
+        while not self._closed:
+            frame_info = self.take()
+            if frame_info is not None:
+                return frame_info
+            self._ready.clear()
+            # Re-check after clearing so a frame published in between is not missed
+            frame_info = self.take()
+            if frame_info is not None:
+                return frame_info
+            await self._ready.wait()
+        return None
+
+    def take(self) -> Optional[dict]:
+        """Remove and return the latest frame, or None if nothing new arrived"""
+        with self._lock:
+            frame_info, self._frame_info = self._frame_info, None
+            return frame_info
+
+    def clear(self):
+        with self._lock:
+            frame_info, self._frame_info = self._frame_info, None
+        release_frame(frame_info)
+
+    def __len__(self) -> int:
+        return 0 if self._frame_info is None else 1
+
+# ==================== SHARED-MEMORY FRAME RING ====================
+RING_HEADER_DTYPE = np.dtype([("sequence", np.int64)])
+RING_SLOT_DTYPE = np.dtype([
+    ("sequence", np.int64),      # -1 while the slot is being written
+    ("timestamp", np.float64),
+    ("scale", np.float64),
+    ("pad_x", np.int32),
+    ("pad_y", np.int32),
+    ("offset_x", np.int32),      # ROI crop origin in the original frame
+    ("offset_y", np.int32),
+    ("height", np.int32),        # dimensions of the original frame stored in the slot
+    ("width", np.int32),
+])
+
+class SharedFrameRing:
+    """
+    Preallocated ring of frame slots in multiprocessing.shared_memory. Each slot
+    holds the original frame (up to frame_capacity bytes), its letterboxed copy
+    and a metadata record. The writer publishes with a per-slot sequence
+    (seqlock style); readers get zero-copy numpy views and can check with
+    is_current() whether a slot was overwritten while they were using it.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, frame_capacity: int):
+        self.shm = shm
+        self.slots = slots
+        self.frame_capacity = frame_capacity
+        self.letterbox_shape = (DETECTION_HEIGHT, DETECTION_WIDTH, 3)
+        letterbox_bytes = int(np.prod(self.letterbox_shape))
+
+        offset = 0
+        self._header = np.ndarray((1,), RING_HEADER_DTYPE, buffer=shm.buf, offset=offset)
+        offset += RING_HEADER_DTYPE.itemsize
+        self._meta = np.ndarray((slots,), RING_SLOT_DTYPE, buffer=shm.buf, offset=offset)
+        offset += RING_SLOT_DTYPE.itemsize * slots
+        offset = (offset + 63) // 64 * 64
+        self._letterboxed = np.ndarray(
+            (slots,) + self.letterbox_shape, np.uint8, buffer=shm.buf, offset=offset
+        )
+        offset += letterbox_bytes * slots
+        self._frames = np.ndarray((slots, frame_capacity), np.uint8, buffer=shm.buf, offset=offset)
+
+    @staticmethod
+    def required_size(slots: int, frame_capacity: int) -> int:
+        header = RING_HEADER_DTYPE.itemsize + RING_SLOT_DTYPE.itemsize * slots
+        header = (header + 63) // 64 * 64
+        return header + slots * (DETECTION_HEIGHT * DETECTION_WIDTH * 3 + frame_capacity)
+
+    @classmethod
+    def create(cls, slots: int = SHM_RING_SLOTS, frame_capacity: int = SHM_FRAME_CAPACITY) -> "SharedFrameRing":
+        shm = shared_memory.SharedMemory(create=True, size=cls.required_size(slots, frame_capacity))
+        ring = cls(shm, slots, frame_capacity)
+        ring._header["sequence"] = 0
+        ring._meta["sequence"] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, slots: int, frame_capacity: int) -> "SharedFrameRing":
+        return cls(shared_memory.SharedMemory(name=name), slots, frame_capacity)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, original_frame, letterboxed_frame, scale: float, pad_x: int, pad_y: int, 
+              offset_x: int = 0, offset_y: int = 0) -> int:
+        """Copy a frame pair into the next slot and publish it; returns its sequence (0 if it did not fit)"""
+        if original_frame.nbytes > self.frame_capacity:
+            return 0
+        sequence = int(self._header["sequence"][0]) + 1
+        slot = sequence % self.slots
+        meta = self._meta[slot]
+        meta["sequence"] = -1
+        height, width = original_frame.shape[:2]
+        np.copyto(self._frames[slot, :original_frame.nbytes].reshape(original_frame.shape), original_frame)
+        np.copyto(self._letterboxed[slot], letterboxed_frame)
+        meta["timestamp"] = time.time()
+        meta["scale"] = scale
+        meta["pad_x"] = pad_x
+        meta["pad_y"] = pad_y
+        meta["offset_x"] = offset_x
+        meta["offset_y"] = offset_y
+        meta["height"] = height
+        meta["width"] = width
+        meta["sequence"] = sequence
+        self._header["sequence"] = sequence
+        return sequence
+
+    def is_current(self, slot: int, sequence: int) -> bool:
+        """True while the slot still holds the given frame"""
+        return int(self._meta[slot]["sequence"]) == sequence
+
+    def read_latest(self) -> Optional[dict]:
+        """Zero-copy views of the newest published frame, in frame_info form"""
+        sequence = int(self._header["sequence"][0])
+        if sequence <= 0:
+            return None
+        slot = sequence % self.slots
+        meta = self._meta[slot].copy()
+        if int(meta["sequence"]) != sequence:
+            return None
+        height, width = int(meta["height"]), int(meta["width"])
+        return {
+            'original_frame': self._frames[slot, :height * width * 3].reshape(height, width, 3),
+            'letterboxed_frame': self._letterboxed[slot],
+            'scale': float(meta["scale"]),
+            'pad_x': int(meta["pad_x"]),
+            'pad_y': int(meta["pad_y"]),
+            'offset_x': int(meta["offset_x"]),
+            'offset_y': int(meta["offset_y"]),
+            'timestamp': float(meta["timestamp"]),
+            'captured_at': float(meta["timestamp"]),
+            'ring_sequence': sequence,
+            'still_valid': lambda: self.is_current(slot, sequence),
+        }
+
+    def close(self):
+        # Views handed out to readers may still exist; the mapping then lives until they are freed
+        self._header = self._meta = self._letterboxed = self._frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class RingFrameSink:
+    """Grabber-side stand-in for FrameMailbox that publishes frames into a SharedFrameRing"""
+
+    def __init__(self, ring: SharedFrameRing, camera_id: str, metrics: "CameraMetrics", event_queue):
+        self.ring = ring
+        self.camera_id = camera_id
+        self.metrics = metrics
+        self.event_queue = event_queue
+        self.frames_dropped = 0  # drops are accounted by the consumer's mailbox
+
+    def put(self, frame_info: dict) -> int:
+        sequence = self.ring.write(
+            frame_info['original_frame'], frame_info['letterboxed_frame'],
+            frame_info['scale'], frame_info['pad_x'], frame_info['pad_y'],
+            frame_info.get('offset_x', 0), frame_info.get('offset_y', 0),
+        )
+        release_frame(frame_info)
+        if not sequence:
+            self.metrics.errors += 1
+            log_with_context(logger, "warning", "Frame larger than shared-memory slot; dropped", 
+                           self.camera_id, self.metrics.camera_name, "ring_overflow")
+            return 0
+        m = self.metrics
+        self.event_queue.put((
+            self.camera_id, sequence,
+            (m.frames_processed, m.connection_attempts, m.successful_connections, m.errors, m.last_frame_time),
+        ))
+        return sequence
+
+def run_grabber_host(command_queue, event_queue):
+    """Entry point of a grabber process: decodes several cameras into their shared-memory rings"""
+    grabbers: Dict[str, Tuple["StreamGrabber", threading.Thread, SharedFrameRing]] = {}
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+
+    while True:
+        command = command_queue.get()
+        if command is None:
+            break
+        action, camera_id = command[0], command[1]
+        if action == "start" and camera_id not in grabbers:
+            _, _, camera_name, rtsp_url, roi, ring_name, slots, capacity = command
+            try:
+                ring = SharedFrameRing.attach(ring_name, slots, capacity)
+            except FileNotFoundError:
+                # The camera stopped (and unlinked its ring) before this start arrived
+                continue
+            metrics = CameraMetrics(camera_id, camera_name)
+            grabber = StreamGrabber(camera_id, camera_name, rtsp_url, 
+                                    build_letterboxer(roi, camera_id, camera_name), metrics, 
+                                    RingFrameSink(ring, camera_id, metrics, event_queue))
+            thread = threading.Thread(target=grabber.run, name=f"grabber-{camera_id}", daemon=True)
+            thread.start()
+            grabbers[camera_id] = (grabber, thread, ring)
+        elif action == "configure" and camera_id in grabbers:
+            # Runtime settings the parent adapts, e.g. frame_stride or decode_mode
+            for key, value in command[2].items():
+                setattr(grabbers[camera_id][0], key, value)
+        elif action == "stop" and camera_id in grabbers:
+            grabber, thread, ring = grabbers.pop(camera_id)
+            grabber.stop_event.set()
+            thread.join(timeout=5)
+            ring.close()
+
+    for grabber, thread, ring in grabbers.values():
+        grabber.stop_event.set()
+    for grabber, thread, ring in grabbers.values():
+        thread.join(timeout=5)
+        ring.close()
+
+class GrabberHostPool:
+    """
+    Singleton set of GRABBER_PROCESSES decode processes. Cameras are assigned
+    round-robin; frames come back through each camera's SharedFrameRing and a
+    small (camera_id, sequence, stats) notification that a dispatcher thread
+    hands to the owning CameraDetector. A watchdog thread respawns hosts that
+    die (e.g. a decoder crash on one bad stream) and restarts their cameras.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_pool()
+                    cls._instance = instance
+        return cls._instance
+
+    def _init_pool(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._event_queue = self._context.Queue()
+        self._hosts = [self._spawn_host(i) for i in range(GRABBER_PROCESSES)]
+        self._started_at = [time.time()] * GRABBER_PROCESSES
+        self._restart_delay = [1.0] * GRABBER_PROCESSES
+        self._restart_at: Dict[int, float] = {}
+        self.restarts = 0
+        self._detectors: Dict[str, "CameraDetector"] = {}
+        self._assignments: Dict[str, int] = {}
+        self._stopping = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="grabber-dispatch", daemon=True)
+        self._dispatcher.start()
+        self._watchdog = threading.Thread(target=self._watch, name="grabber-watchdog", daemon=True)
+        self._watchdog.start()
+        log_with_context(logger, "info", f"Started {GRABBER_PROCESSES} grabber processes", event_key="grabber_hosts")
+
+    def _spawn_host(self, host: int) -> Tuple[multiprocessing.Process, "multiprocessing.Queue"]:
+        # A fresh command queue: a host that died may have left the old one locked
+        command_queue = self._context.Queue()
+        process = self._context.Process(
+            target=run_grabber_host, args=(command_queue, self._event_queue),
+            name=f"grabber-host-{host}", daemon=True,
+        )
+        process.start()
+        return process, command_queue
+
+    def _send_start(self, host: int, detector: "CameraDetector", ring: SharedFrameRing):
+        command_queue = self._hosts[host][1]
+        command_queue.put((
+            "start", detector.camera_id, detector.camera_name, detector.rtsp_url, detector.roi,
+            ring.name, ring.slots, ring.frame_capacity,
+        ))
+        # The grabber starts from the defaults; carry over what the detector has adapted so far
+        command_queue.put(("configure", detector.camera_id, 
+                           {"frame_stride": detector.frame_stride, "decode_mode": detector.decode_mode}))
+
+    def start_camera(self, detector: "CameraDetector", ring: SharedFrameRing):
+        with self._lock:
+            if detector.camera_id not in self._assignments:
+                self._assignments[detector.camera_id] = len(self._assignments) % len(self._hosts)
+            host = self._assignments[detector.camera_id]
+            self._detectors[detector.camera_id] = detector
+            self._send_start(host, detector, ring)
+
+    def configure_camera(self, camera_id: str, **settings):
+        """Apply runtime settings to a camera's grabber in its host process"""
+        with self._lock:
+            host = self._assignments.get(camera_id)
+            if host is not None:
+                self._hosts[host][1].put(("configure", camera_id, settings))
+
+    def stop_camera(self, camera_id: str):
+        with self._lock:
+            self._detectors.pop(camera_id, None)
+            host = self._assignments.get(camera_id)
+            if host is not None:
+                self._hosts[host][1].put(("stop", camera_id))
+
+    def _watch(self):
+        """Respawn dead grabber hosts, with per-host exponential backoff, and restart their cameras"""
+        while not self._stopping.wait(1.0):
+            now = time.time()
+            for host, (process, _) in enumerate(self._hosts):
+                if process.is_alive():
+                    continue
+                if host not in self._restart_at:
+                    # A host that ran for a while starts over with a short delay
+                    if now - self._started_at[host] > 60:
+                        self._restart_delay[host] = 1.0
+                    delay = self._restart_delay[host]
+                    self._restart_delay[host] = min(delay * 2, 60)
+                    self._restart_at[host] = now + delay
+                    log_with_context(logger, "warning", 
+                                   f"Grabber host {host} exited (code={process.exitcode}); restarting in {delay:.0f}s", 
+                                   event_key="grabber_crash")
+                elif now >= self._restart_at[host]:
+                    del self._restart_at[host]
+                    self._restart_host(host)
+
+    def _restart_host(self, host: int):
+        with self._lock:
+            if self._stopping.is_set():
+                return
+            self._hosts[host] = self._spawn_host(host)
+            self._started_at[host] = time.time()
+            self.restarts += 1
+            restarted = 0
+            for camera_id, detector in self._detectors.items():
+                with detector._ring_lock:
+                    ring = detector._ring
+                if self._assignments.get(camera_id) == host and ring is not None:
+                    # The ring lives in this process, so the new host attaches to the same memory
+                    self._send_start(host, detector, ring)
+                    restarted += 1
+        log_with_context(logger, "info", f"Restarted grabber host {host} with {restarted} cameras", 
+                       event_key="grabber_hosts")
+
+    def _dispatch(self):
+        while True:
+            item = self._event_queue.get()
+            if item is None:
+                break
+            camera_id, sequence, stats = item
+            detector = self._detectors.get(camera_id)
+            if detector is None:
+                continue
+            try:
+                detector.on_ring_frame(sequence, stats)
+            except Exception as e:
+                # One camera's failure must not stop frame delivery for every other camera
+                log_with_context(logger, "error", f"Ring frame dispatch error: {e}", 
+                               camera_id, detector.camera_name, "ring_dispatch")
+
+    def shutdown(self):
+        with self._lock:
+            self._stopping.set()
+        self._watchdog.join(timeout=5)
+        for process, command_queue in self._hosts:
+            command_queue.put(None)
+        for process, _ in self._hosts:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+        self._event_queue.put(None)
+
+# ==================== COOLDOWN STORE ====================
+class CooldownStore:
+    """
+    Cooldown timestamps per key with time-based eviction. Entries are kept in an
+    OrderedDict in last-fired order, so expired ones are always at the front and are
+    swept on each call; max_entries caps memory on top of the TTL. Lookups stay O(1).
+    """
+
+    def __init__(self, cooldown_seconds: float, max_entries: int = COOLDOWN_MAX_ENTRIES):
+        self.cooldown_seconds = cooldown_seconds
+        self.max_entries = max_entries
+        self._fired_at: "OrderedDict[object, float]" = OrderedDict()
+        self.hits = 0  # Calls suppressed by an active cooldown
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        # An entry older than the cooldown behaves exactly like a missing one
+        while self._fired_at:
+            key, fired_at = next(iter(self._fired_at.items()))
+            if now - fired_at < self.cooldown_seconds and len(self._fired_at) <= self.max_entries:
+                break
+            del self._fired_at[key]
+            self.evictions += 1
+
+    def allow(self, key, now: Optional[float] = None) -> bool:
+        """True (and restart the cooldown) if key is not cooling down"""
+        now = time.time() if now is None else now
+        self._evict(now)
+        fired_at = self._fired_at.get(key)
+        if fired_at is not None and now - fired_at < self.cooldown_seconds:
+            self.hits += 1
+            return False
+        self._fired_at[key] = now
+        self._fired_at.move_to_end(key)
+        if len(self._fired_at) > self.max_entries:
+            self._evict(now)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._fired_at)
+
 # ==================== CAMERA DETECTOR ====================
-class CameraDetector:
-    """Individual camera detection handler with improved performance and tracking"""
+class CaptureOpener:
+    """
+    Opens OpenCV FFmpeg captures with a per-camera decode mode. OpenCV reads
+    OPENCV_FFMPEG_CAPTURE_OPTIONS from the process environment while a capture
+    opens, so full-decode opens run concurrently and an open with a reduced
+    mode briefly has the environment to itself.
+    """
+    ENV_KEY = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+    _condition = threading.Condition()
+    _readers = 0
+    _writing = False
+
+    @classmethod
+    def open(cls, rtsp_url: str, decode_mode: str = "full") -> cv2.VideoCapture:
+        discard = DECODE_MODES.get(decode_mode)
+        if discard is None:
+            with cls._condition:
+                while cls._writing:
+                    cls._condition.wait()
+                cls._readers += 1
+            try:
+                return cv2.VideoCapture(rtsp_url)
+            finally:
+                with cls._condition:
+                    cls._readers -= 1
+                    cls._condition.notify_all()
+
+        with cls._condition:
+            while cls._writing or cls._readers:
+                cls._condition.wait()
+            cls._writing = True
+        previous = os.environ.get(cls.ENV_KEY)
+        try:
+            # OpenCV reads "key;value" pairs separated by "|". Without the variable it defaults
+            # to RTSP over TCP; keep that when adding options
+            os.environ[cls.ENV_KEY] = f"{previous or 'rtsp_transport;tcp'}|avdiscard;{discard}"
+            return cv2.VideoCapture(rtsp_url)
+        finally:
+            if previous is None:
+                os.environ.pop(cls.ENV_KEY, None)
+            else:
+                os.environ[cls.ENV_KEY] = previous
+            with cls._condition:
+                cls._writing = False
+                cls._condition.notify_all()
+
+class StreamGrabber:
+    """
+    Decode side of one camera: reads the RTSP stream in the configured decode mode, applies
+    the frame stride, letterboxes kept frames and publishes them to a sink (the camera's
+    FrameMailbox, or a RingFrameSink in a grabber process). It holds no model, tracker or
+    backend state, so grabber processes build only this.
+    """
 
-    def __init__(self, camera_id: str, camera_name: str, rtsp_url: str):
+    def __init__(self, camera_id: str, camera_name: str, rtsp_url: str, letterboxer: "Letterboxer", 
+                 metrics: "CameraMetrics", sink, stop_event: Optional[threading.Event] = None):
         self.camera_id = camera_id
         self.camera_name = camera_name
         self.rtsp_url = rtsp_url
-        
-        # Get shared model
-        self.model_manager = ModelManager()
-        
-        # Threading and queues
-        self.frame_queue: "queue.Queue" = queue.Queue(maxsize=10)
-        self.stop_event = threading.Event()
-        self.is_running = False
-        
-        # Metrics and tracking
-        self.metrics = CameraMetrics(camera_id, camera_name)
+        self.letterboxer = letterboxer
+        self.metrics = metrics
+        self.sink = sink
+        self.stop_event = stop_event or threading.Event()
+
+        # Adapted at runtime by the owning CameraDetector (directly, or via a "configure" command)
+        self.frame_stride = FRAME_STRIDE
+        self.decode_mode = "keyframe" if camera_id in KEYFRAME_ONLY_CAMERAS else "full"
         self._frame_counter = 0
-        
-        # Per-track cooldown mapping: (camera_id, class_id, track_id) -> last_snapshot_time
-        self._track_snapshots: Dict[Tuple[str, int, int], float] = {}
-        
-        # General detection cooldown (legacy)
-        self._last_event_at: Dict[str, float] = {}
-        
-        # Letterboxing parameters for current stream
         self._letterbox_params = None
 
     def _get_opencv_capture_options(self) -> dict:
@@ -264,83 +2037,55 @@ class CameraDetector:
                         options[key] = value
         return options
 
-    async def update_camera_status(self, status: str):
-        """Update camera status in backend"""
-        try:
-            response = requests.put(
-                f"{API_BASE_URL}/cameras/{self.camera_id}/status",
-                json={"status": status},
-                headers={"X-API-Key": API_KEY},
-                timeout=5
-            )
-            if response.status_code == 200:
-                self.metrics.status = status
-                log_with_context(logger, "info", f"Status updated to {status}", 
-                               self.camera_id, self.camera_name, "status_update")
-            else:
-                log_with_context(logger, "error", f"Failed to update status: {response.status_code}", 
-                               self.camera_id, self.camera_name, "status_error")
-        except Exception as e:
-            self.metrics.errors += 1
-            log_with_context(logger, "error", f"Error updating status: {e}", 
-                           self.camera_id, self.camera_name, "status_error")
-
-    async def log_detection_event(self, person_id: int, confidence: float, 
-                                bbox: List[float], image_path: Optional[str] = None):
-        """Log detection event via API"""
-        try:
-            event_data = {
-                "camera_id": str(self.camera_id),
-                "timestamp": datetime.now().isoformat(),
-                "person_id": person_id,
-                "confidence": confidence,
-                "camera_name": self.camera_name,
-                "image_path": image_path,
-                "alert_sent": False,
-                "metadata": {
-                    "bbox": bbox,
-                    "location": self.camera_name
-                }
-            }
-
-            response = requests.post(
-                f"{API_BASE_URL}/events",
-                json=event_data,
-                headers={
-                    "X-API-Key": API_KEY,
-                    "Content-Type": "application/json"
-                },
-                timeout=10
-            )
-
-            if response.status_code == 200:
-                self.metrics.events_logged += 1
-                log_with_context(logger, "info", f"Event logged (confidence: {confidence:.2f})", 
-                               self.camera_id, self.camera_name, "event_log")
-            else:
-                self.metrics.errors += 1
-                log_with_context(logger, "error", f"Failed to log event: {response.status_code}", 
-                               self.camera_id, self.camera_name, "event_error")
-
-        except Exception as e:
-            self.metrics.errors += 1
-            log_with_context(logger, "error", f"Error logging event: {e}", 
-                           self.camera_id, self.camera_name, "event_error")
-
-    def frame_grabber(self):
-        """Capture frames from RTSP stream with OpenCV optimizations"""
+    def _check_reduced_decode(self, cap_mode: str, reduced_fps: float, full_fps: Optional[float]):
+        """Warn when a reduced-decode capture grabs about as many frames as full decode did"""
+        if full_fps is None:
+            return
+        if reduced_fps > full_fps / 2:
+            log_with_context(logger, "warning", 
+                           f"{cap_mode} decode grabs {reduced_fps:.1f} fps vs {full_fps:.1f} fps in full decode; "
+                           "the stream may be all keyframes or the FFmpeg backend ignores avdiscard", 
+                           self.camera_id, self.camera_name, "decode_check")
+        else:
+            log_with_context(logger, "debug", 
+                           f"{cap_mode} decode grabs {reduced_fps:.1f} fps vs {full_fps:.1f} fps in full decode", 
+                           self.camera_id, self.camera_name, "decode_check")
+
+    def run(self):
+        """Capture frames from RTSP stream with OpenCV optimizations until stop_event is set"""
         cap = None
+        cap_mode = None
         reconnect_delay = 1
         max_reconnect_delay = 30
+        # Grabs on the current capture, to check that keyframe mode really decodes fewer frames
+        cap_opened_at = 0.0
+        cap_grabs = 0
+        full_fps = None
+        decode_checked = True
+        kept_at = 0.0
 
         while not self.stop_event.is_set():
             try:
-                if cap is None:
+                if cap is not None and self.decode_mode != cap_mode:
+                    # The decode mode is fixed when the stream opens; reopen without counting a reconnect
+                    log_with_context(logger, "info", f"Switching decode mode {cap_mode} -> {self.decode_mode}", 
+                                   self.camera_id, self.camera_name, "decode_mode")
+                    elapsed = time.monotonic() - cap_opened_at
+                    if cap_mode == "full" and elapsed >= DECODE_CHECK_SECONDS:
+                        full_fps = cap_grabs / elapsed
+                    cap.release()
+                    cap = None
+                elif cap is None:
                     self.metrics.connection_attempts += 1
                     log_with_context(logger, "info", f"Connecting to {self.rtsp_url}", 
                                    self.camera_id, self.camera_name, "connection")
-                    
-                    cap = cv2.VideoCapture(self.rtsp_url)
+
+                if cap is None:
+                    cap_mode = self.decode_mode
+                    cap = CaptureOpener.open(self.rtsp_url, cap_mode)
+                    cap_opened_at = time.monotonic()
+                    cap_grabs = 0
+                    decode_checked = cap_mode == "full"
                     
                     # Apply OpenCV optimizations
                     cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
@@ -366,8 +2111,11 @@ class CameraDetector:
                     reconnect_delay = min(reconnect_delay * 2, max_reconnect_delay)
                     continue
 
-                ret, frame = cap.read()
+                # grab() only demuxes/decodes into the capture; retrieve() is paid for kept frames
+                grab_started = time.monotonic()
+                ret = cap.grab()
                 if ret:
+                    captured_at = time.time()
                     # Connection successful
                     if self.metrics.successful_connections == self.metrics.connection_attempts - 1:
                         self.metrics.successful_connections += 1
@@ -376,40 +2124,58 @@ class CameraDetector:
                     
                     reconnect_delay = 1
                     self.metrics.frames_processed += 1
+                    self.metrics.grab_rate.add()
                     self.metrics.last_frame_time = time.time()
+                    cap_grabs += 1
+                    if not decode_checked and time.monotonic() - cap_opened_at >= DECODE_CHECK_SECONDS:
+                        decode_checked = True
+                        self._check_reduced_decode(cap_mode, cap_grabs / (time.monotonic() - cap_opened_at), full_fps)
+
+                    # Apply the frame stride here so skipped frames are never converted or letterboxed
+                    self._frame_counter += 1
+                    if cap_mode == "full":
+                        if self.frame_stride > 1 and (self._frame_counter % self.frame_stride != 0):
+                            continue
+                    elif captured_at - kept_at < REDUCED_DECODE_INTERVAL:
+                        # Keyframes are already sparse; this only holds back short GOPs
+                        continue
+                    kept_at = captured_at
 
-                    # Apply letterboxing if this is the first frame or size changed
-                    if self._letterbox_params is None:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        log_with_context(logger, "warning", "Failed to retrieve frame", 
+                                       self.camera_id, self.camera_name, "frame_fail")
+                        continue
+                    # Decode includes waiting on the stream for the frame to arrive
+                    letterbox_started = time.monotonic()
+                    self.metrics.latency["decode"].record(letterbox_started - grab_started)
+
+                    # Apply letterboxing into a pooled canvas (geometry cached per resolution)
+                    letterboxed_frame, scale, pad_x, pad_y = self.letterboxer.letterbox(frame)
+                    self.metrics.latency["letterbox"].record(time.monotonic() - letterbox_started)
+                    if self.letterboxer.params != self._letterbox_params:
+                        self._letterbox_params = self.letterboxer.params
                         src_height, src_width = frame.shape[:2]
-                        self._letterbox_params = calculate_letterbox_params(
-                            src_width, src_height, DETECTION_WIDTH, DETECTION_HEIGHT
-                        )
                         log_with_context(logger, "info", 
                                        f"Frame size: {src_width}x{src_height}, letterbox params: {self._letterbox_params}", 
                                        self.camera_id, self.camera_name, "letterbox_init")
 
-                    # Apply letterboxing
-                    letterboxed_frame, scale, pad_x, pad_y = letterbox_frame(frame, DETECTION_WIDTH, DETECTION_HEIGHT)
-
                     # Store original frame info for bbox conversion
                     frame_info = {
                         'original_frame': frame,
                         'letterboxed_frame': letterboxed_frame,
                         'scale': scale,
                         'pad_x': pad_x,
-                        'pad_y': pad_y
+                        'pad_y': pad_y,
+                        'offset_x': self.letterboxer.offset[0],
+                        'offset_y': self.letterboxer.offset[1],
+                        'release': functools.partial(self.letterboxer.release, letterboxed_frame),
+                        'captured_at': captured_at,
                     }
 
-                    # Add to queue (non-blocking)
-                    try:
-                        self.frame_queue.put(frame_info, block=False)
-                    except queue.Full:
-                        # Remove oldest frame and add new one
-                        try:
-                            self.frame_queue.get_nowait()
-                            self.frame_queue.put(frame_info, block=False)
-                        except queue.Empty:
-                            pass
+                    # Publish as the latest frame (replaces any frame inference has not taken yet)
+                    self.sink.put(frame_info)
+                    self.metrics.frames_dropped = self.sink.frames_dropped
                 else:
                     log_with_context(logger, "warning", "Failed to read frame", 
                                    self.camera_id, self.camera_name, "frame_fail")
@@ -433,6 +2199,199 @@ class CameraDetector:
         log_with_context(logger, "info", "Frame grabber stopped", 
                        self.camera_id, self.camera_name, "grabber_stop")
 
+def build_letterboxer(roi, camera_id: str, camera_name: str) -> "Letterboxer":
+    """Letterboxer for a camera's detection zone; an invalid ROI falls back to the whole frame"""
+    try:
+        roi_points = parse_roi(roi)
+    except (ValueError, TypeError, KeyError) as e:
+        log_with_context(logger, "warning", f"Ignoring invalid detection ROI: {e}", 
+                       camera_id, camera_name, "roi_invalid")
+        roi_points = None
+    return Letterboxer(DETECTION_WIDTH, DETECTION_HEIGHT, roi_points)
+
+class CameraDetector:
+    """Individual camera detection handler with improved performance and tracking"""
+
+    def __init__(self, camera_id: str, camera_name: str, rtsp_url: str, 
+                 target_fps: float = TARGET_INFERENCE_FPS, motion_sensitivity: float = MOTION_SENSITIVITY,
+                 roi=None):
+        self.camera_id = camera_id
+        self.camera_name = camera_name
+        self.rtsp_url = rtsp_url
+        self.roi = roi  # Detection zone as configured in dbo.camera_devices (None = whole frame)
+
+        # Minimum interval between inferences for this camera
+        self.target_fps = target_fps
+        self._min_interval = 1.0 / target_fps if target_fps > 0 else 0.0
+        
+        # Get shared model, backend client and snapshot writer
+        self.model_manager = ModelManager()
+        self.api = ApiClient()
+        self.snapshot_writer = SnapshotWriter()
+        self._event_tasks: set = set()
+        
+        # Threading and latest-frame handoff
+        self.frame_mailbox = FrameMailbox()
+        self.stop_event = threading.Event()
+        self.is_running = False
+        
+        # Metrics and tracking
+        self.metrics = CameraMetrics(camera_id, camera_name)
+
+        # Effective frame stride, adapted to activity and inference backlog
+        self.frame_stride = FRAME_STRIDE
+        self.keyframe_only = camera_id in KEYFRAME_ONLY_CAMERAS
+        self.decode_mode = self.metrics.decode_mode = "keyframe" if self.keyframe_only else "full"
+        self._stride_backoff = 1
+        self._stride_checked_at = 0.0
+        self._last_activity_at = time.monotonic()
+        
+        # Per-track cooldown: (class_id, track_id) -> last snapshot time, expired entries evicted
+        self._track_snapshots = CooldownStore(TRACK_COOLDOWN_SECONDS)
+        
+        # General detection cooldown (legacy): quantized bbox key -> last event time
+        self._last_event_at = CooldownStore(EVENT_COOLDOWN_SECONDS)
+        
+        # Decoding and letterboxing into preallocated canvases (run on a thread unless in a grabber process)
+        self.letterboxer = build_letterboxer(roi, camera_id, camera_name)
+        self.grabber = StreamGrabber(camera_id, camera_name, rtsp_url, self.letterboxer, 
+                                     self.metrics, self.frame_mailbox, self.stop_event)
+
+        # Tracker state is per camera; model weights are shared through ModelManager. Track IDs
+        # keep counting across tracker rebuilds so they never collide with IDs still in cooldown
+        self._track_ids = itertools.count(1)
+        self.tracker = CameraTracker(self._track_ids)
+
+        # Skip inference on static scenes
+        self.motion_gate = MotionGate(motion_sensitivity) if MOTION_GATE_ENABLED else None
+
+        # Shared-memory ring when decoding runs in a grabber process (GRABBER_PROCESSES > 0)
+        self._ring: Optional[SharedFrameRing] = None
+        self._ring_lock = threading.Lock()  # Guards _ring between the dispatcher thread and stop()
+        self._last_ring_sequence = 0
+        self._ring_skipped = 0
+        self._grabber_errors = 0
+
+    async def update_camera_status(self, status: str):
+        """Update camera status in backend"""
+        try:
+            status_code, _ = await self.api.request(
+                "PUT", f"/cameras/{self.camera_id}/status", {"status": status}
+            )
+            if status_code == 200:
+                self.metrics.status = status
+                log_with_context(logger, "info", f"Status updated to {status}", 
+                               self.camera_id, self.camera_name, "status_update")
+            else:
+                log_with_context(logger, "error", f"Failed to update status: {status_code}", 
+                               self.camera_id, self.camera_name, "status_error")
+        except Exception as e:
+            self.metrics.errors += 1
+            log_with_context(logger, "error", f"Error updating status: {e}", 
+                           self.camera_id, self.camera_name, "status_error")
+
+    async def log_detection_event(self, person_id: int, confidence: float, 
+                                bbox: List[float], image_path: Optional[str] = None,
+                                image_future: Optional[Future] = None, captured_at: Optional[float] = None):
+        """Spool detection event for delivery to the API"""
+        try:
+            if image_future is not None:
+                # Filename comes back from the snapshot writer (None if dropped or failed)
+                image_path = await asyncio.wrap_future(image_future)
+
+            event_data = {
+                "camera_id": str(self.camera_id),
+                "timestamp": datetime.now().isoformat(),
+                "person_id": person_id,
+                "confidence": confidence,
+                "camera_name": self.camera_name,
+                "image_path": image_path,
+                "alert_sent": False,
+                "metadata": {
+                    "bbox": bbox,
+                    "location": self.camera_name
+                }
+            }
+
+            EventSpool().append(event_data, self.metrics, captured_at)
+            log_with_context(logger, "debug", f"Event spooled (confidence: {confidence:.2f})", 
+                           self.camera_id, self.camera_name, "event_log")
+
+        except Exception as e:
+            self.metrics.errors += 1
+            log_with_context(logger, "error", f"Error logging event: {e}", 
+                           self.camera_id, self.camera_name, "event_error")
+
+    def on_ring_frame(self, sequence: int, stats: tuple):
+        """Called by the grabber dispatcher thread when this camera's grabber process published a frame"""
+        frames_processed, connection_attempts, successful_connections, grabber_errors, last_frame_time = stats
+        if frames_processed > self.metrics.frames_processed:
+            self.metrics.grab_rate.add(frames_processed - self.metrics.frames_processed)
+        self.metrics.frames_processed = frames_processed
+        self.metrics.connection_attempts = connection_attempts
+        self.metrics.successful_connections = successful_connections
+        self.metrics.last_frame_time = last_frame_time
+        self.metrics.errors += max(0, grabber_errors - self._grabber_errors)
+        self._grabber_errors = grabber_errors
+
+        with self._ring_lock:
+            ring = self._ring
+            if ring is None:
+                return
+            frame_info = ring.read_latest()
+            if frame_info is None or frame_info['ring_sequence'] <= self._last_ring_sequence:
+                return
+            # Frames overwritten in the ring before we read them count as dropped too
+            if self._last_ring_sequence:
+                self._ring_skipped += frame_info['ring_sequence'] - self._last_ring_sequence - 1
+            self._last_ring_sequence = frame_info['ring_sequence']
+            self.frame_mailbox.put(frame_info)
+        self.metrics.frames_dropped = self.frame_mailbox.frames_dropped + self._ring_skipped
+
+    def _configure_grabber(self, **settings):
+        """Hand adapted decode settings to the grabber thread, or to the camera's grabber process"""
+        if self._ring is not None:
+            GrabberHostPool().configure_camera(self.camera_id, **settings)
+        else:
+            for key, value in settings.items():
+                setattr(self.grabber, key, value)
+
+    def _update_stride(self, now: float):
+        """Tighten the stride while people are present, relax it when idle, back off when inference lags"""
+        if not ADAPTIVE_STRIDE_ENABLED or now - self._stride_checked_at < 1.0:
+            return
+        self._stride_checked_at = now
+
+        idle_for = now - self._last_activity_at
+        if idle_for < STRIDE_ACTIVE_SECONDS:
+            stride = FRAME_STRIDE_MIN
+        elif idle_for >= STRIDE_IDLE_SECONDS:
+            stride = FRAME_STRIDE_MAX
+        else:
+            stride = FRAME_STRIDE
+
+        if self.model_manager.get_executor().overloaded:
+            self._stride_backoff = min(self._stride_backoff * 2, 8)
+        else:
+            self._stride_backoff = max(self._stride_backoff // 2, 1)
+        stride = max(FRAME_STRIDE_MIN, min(stride * self._stride_backoff, FRAME_STRIDE_MAX))
+
+        if stride != self.frame_stride:
+            log_with_context(logger, "debug", 
+                           f"Frame stride {self.frame_stride} -> {stride} (idle {idle_for:.0f}s, backoff x{self._stride_backoff})", 
+                           self.camera_id, self.camera_name, "stride_change")
+            self.frame_stride = self.metrics.frame_stride = stride
+            self._configure_grabber(frame_stride=stride)
+
+    def _update_decode_mode(self, now: float):
+        """Decode idle cameras in DECODE_IDLE_MODE; return to full decode as soon as people are detected"""
+        if self.keyframe_only:
+            return
+        mode = DECODE_IDLE_MODE if now - self._last_activity_at >= DECODE_IDLE_SECONDS else "full"
+        if mode != self.decode_mode:
+            self.decode_mode = self.metrics.decode_mode = mode
+            self._configure_grabber(decode_mode=mode)
+
     @staticmethod
     def _box_area(bbox: List[float]) -> float:
         """Calculate bounding box area"""
@@ -445,36 +2404,24 @@ class CameraDetector:
         if track_id is None:
             return True  # Fallback to old behavior if no track ID
             
-        track_key = (self.camera_id, class_id, track_id)
-        now = time.time()
-        last_snapshot = self._track_snapshots.get(track_key, 0.0)
-        
-        if now - last_snapshot >= TRACK_COOLDOWN_SECONDS:
-            self._track_snapshots[track_key] = now
-            return True
-        return False
+        return self._track_snapshots.allow((class_id, track_id))
 
-    def _detection_key(self, box) -> str:
-        """Build a stable key for a detection (legacy cooldown)"""
-        try:
-            if box.id is not None:
-                return f"id:{int(box.id)}"
-        except Exception:
-            pass
-        # Fallback: quantize bbox
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().tolist()
+    def _detection_key(self, bbox: List[float]) -> str:
+        """Build a stable key for an untracked detection from its quantized letterboxed bbox (legacy cooldown)"""
+        x1, y1, x2, y2 = bbox
         return f"bb:{round(x1/10)}-{round(y1/10)}-{round(x2/10)}-{round(y2/10)}"
 
     def _should_emit_event(self, key: str, bbox: List[float]) -> bool:
         """Rate-limit events per key and ignore tiny boxes (legacy)"""
         if MIN_BOX_AREA > 0 and bbox and self._box_area(bbox) < MIN_BOX_AREA:
             return False
-        now = time.time()
-        last = self._last_event_at.get(key, 0.0)
-        if now - last < EVENT_COOLDOWN_SECONDS:
-            return False
-        self._last_event_at[key] = now
-        return True
+        return self._last_event_at.allow(key)
+
+    def _sync_cooldown_metrics(self):
+        stores = (self._track_snapshots, self._last_event_at)
+        self.metrics.cooldown_hits = sum(store.hits for store in stores)
+        self.metrics.cooldown_evictions = sum(store.evictions for store in stores)
+        self.metrics.cooldown_entries = sum(len(store) for store in stores)
 
     async def start(self):
         """Start camera detection"""
@@ -486,14 +2433,22 @@ class CameraDetector:
         self.is_running = True
         self.stop_event.clear()
         self.metrics.status = "starting"
-
-        # Start frame grabber thread
-        self.frame_grabber_thread = threading.Thread(
-            target=self.frame_grabber, 
-            name=f"grabber-{self.camera_id}", 
-            daemon=True
-        )
-        self.frame_grabber_thread.start()
+        self.tracker = CameraTracker(self._track_ids)
+        self.frame_mailbox.open(asyncio.get_running_loop())
+
+        if GRABBER_PROCESSES > 0:
+            # Decode in a grabber process; frames arrive through shared memory
+            self._ring = SharedFrameRing.create()
+            self._last_ring_sequence = 0
+            GrabberHostPool().start_camera(self, self._ring)
+        else:
+            # Start frame grabber thread
+            self.frame_grabber_thread = threading.Thread(
+                target=self.grabber.run, 
+                name=f"grabber-{self.camera_id}", 
+                daemon=True
+            )
+            self.frame_grabber_thread.start()
 
         # Update camera status to online
         await self.update_camera_status("online")
@@ -507,111 +2462,161 @@ class CameraDetector:
                        self.camera_id, self.camera_name, "stop")
         self.is_running = False
         self.stop_event.set()
+        self.frame_mailbox.close()
 
-        # Wait for frame grabber thread to finish
-        if hasattr(self, 'frame_grabber_thread'):
-            self.frame_grabber_thread.join(timeout=5)
+        # Detach the ring first so the dispatcher thread cannot read it once it is closed
+        with self._ring_lock:
+            ring, self._ring = self._ring, None
 
-        # Clear queues
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Wait for frame grabber thread to finish
+        if ring is not None:
+            GrabberHostPool().stop_camera(self.camera_id)
+        elif hasattr(self, 'frame_grabber_thread'):
+            # Off the loop: other cameras keep running while a stalled stream times out
+            await asyncio.to_thread(self.frame_grabber_thread.join, 5)
+
+        # Release the pending frame and let in-flight events reach the spool
+        self.frame_mailbox.clear()
+        if self._event_tasks:
+            await asyncio.gather(*self._event_tasks, return_exceptions=True)
+        if ring is not None:
+            ring.close()
+            ring.unlink()
 
         # Update camera status to offline
         await self.update_camera_status("offline")
 
     async def process_detections(self):
         """Main detection processing loop with improved tracking and cooldowns"""
-        model = self.model_manager.get_model()
+        batcher = self.model_manager.get_batcher()
         
         while self.is_running:
             try:
-                # Get frame from queue (non-blocking)
-                try:
-                    frame_info = self.frame_queue.get_nowait()
-                except queue.Empty:
-                    await asyncio.sleep(0.1)
+                # Wake as soon as the grabber publishes a frame
+                frame_info = await self.frame_mailbox.get()
+                if frame_info is None:
                     continue
-
-                # Optional: process every Nth frame
-                self._frame_counter += 1
-                if FRAME_STRIDE > 1 and (self._frame_counter % FRAME_STRIDE != 0):
-                    await asyncio.sleep(0)  # yield
+                started = time.monotonic()
+                latency = self.metrics.latency
+                published_at = frame_info.get('published_at')
+                if published_at is not None:
+                    latency["queue_wait"].record(started - published_at)
+                self._update_stride(started)
+                self._update_decode_mode(started)
+
+                if self.motion_gate is not None and not self.motion_gate.should_infer(
+                        frame_info['letterboxed_frame'], started):
+                    release_frame(frame_info)
+                    self.metrics.frames_motion_skipped += 1
                     continue
+                self.metrics.frames_inferred += 1
+                self.metrics.inference_rate.add()
 
                 original_frame = frame_info['original_frame']
                 letterboxed_frame = frame_info['letterboxed_frame']
                 scale = frame_info['scale']
                 pad_x = frame_info['pad_x']
                 pad_y = frame_info['pad_y']
+                offset_x = frame_info.get('offset_x', 0)
+                offset_y = frame_info.get('offset_y', 0)
+
+                captured_at = frame_info.get('captured_at')
+
+                # Run detection + tracking on letterboxed frame (off the event loop)
+                inference_started = time.monotonic()
+                try:
+                    results = await batcher.submit(letterboxed_frame, self.tracker, frame_info.get('still_valid'))
+                finally:
+                    # Only the model reads the letterboxed canvas; return it to the pool
+                    release_frame(frame_info)
+                postprocess_started = time.monotonic()
+                latency["inference"].record(postprocess_started - inference_started)
+
+                # A shared-memory slot may have been reused while inference ran
+                still_valid = frame_info.get('still_valid')
+                if still_valid is not None and not still_valid():
+                    log_with_context(logger, "debug", "Frame slot overwritten during inference; skipped", 
+                                   self.camera_id, self.camera_name, "ring_overrun")
+                    continue
+
+                boxes = results[0].boxes if results and results[0] is not None else None
+                if boxes is not None and len(boxes):
+                    # One device-to-host copy: rows are x1, y1, x2, y2, [track id,] conf, cls
+                    data = boxes.data.cpu().numpy()
+                    keep = (data[:, -1] == 0) & (data[:, -2] > CONFIDENCE_THRESHOLD)  # Person class in COCO
+                    people = data[keep]
+
+                    if len(people):
+                        self.metrics.detections_made += len(people)
+                        self._last_activity_at = started
+                        if self.motion_gate is not None:
+                            self.motion_gate.mark_activity(started)
+                        self._update_decode_mode(started)
+
+                        # Convert all boxes back to original coordinates and drop tiny ones at once
+                        original_boxes = unletterbox_boxes(people[:, :4], scale, pad_x, pad_y, offset_x, offset_y)
+                        if MIN_BOX_AREA > 0:
+                            areas = (np.clip(original_boxes[:, 2] - original_boxes[:, 0], 0, None) * 
+                                     np.clip(original_boxes[:, 3] - original_boxes[:, 1], 0, None))
+                            large = areas >= MIN_BOX_AREA
+                            people, original_boxes = people[large], original_boxes[large]
+
+                        # Only boxes that pass the masks reach the per-box path below
+                        tracked = data.shape[1] == 7
+                        for row, original_bbox in zip(people.tolist(), original_boxes.tolist()):
+                            confidence = row[-2]
+                            track_id = int(row[4]) if tracked else None
 
-                # Run detection + tracking on letterboxed frame
-                results = model.track(letterboxed_frame, persist=True, verbose=False)
-
-                if results and results[0].boxes is not None:
-                    for box in results[0].boxes:
-                        # Filter for person class (class 0 in COCO dataset)
-                        class_id = int(box.cls)
-                        if class_id == 0 and float(box.conf) > CONFIDENCE_THRESHOLD:
-                            
-                            # Extract detection info
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                            letterboxed_bbox = [float(x1), float(y1), float(x2), float(y2)]
-                            confidence = float(box.conf)
-                            track_id = int(box.id) if box.id is not None else None
-                            
-                            # Convert bbox back to original coordinates
-                            original_bbox = unletterbox_bbox(letterboxed_bbox, scale, pad_x, pad_y)
-                            
-                            self.metrics.detections_made += 1
-                            
                             # Check per-track cooldown first (primary method)
                             if track_id is not None:
-                                should_save = self._should_save_track_snapshot(class_id, track_id)
+                                should_save = self._should_save_track_snapshot(0, track_id)
                             else:
                                 # Fallback to legacy cooldown for detections without track IDs
-                                key = self._detection_key(box)
+                                key = self._detection_key(row[:4])
                                 should_save = self._should_emit_event(key, original_bbox)
-                            
+
                             if not should_save:
                                 continue
-                            
-                            # Check minimum box area after coordinate conversion
-                            if MIN_BOX_AREA > 0 and self._box_area(original_bbox) < MIN_BOX_AREA:
-                                continue
 
                             # Save image crop from original frame
                             x1i, y1i, x2i, y2i = map(lambda v: max(0, int(v)), original_bbox)
                             crop = original_frame[y1i:y2i, x1i:x2i]
-                            image_to_save = crop if crop.size > 0 else original_frame
-
-                            # Generate unique filename
-                            track_suffix = f"_t{track_id}" if track_id is not None else ""
-                            filename = f"{self.camera_id}{track_suffix}_{int(time.time()*1000)}.jpg"
-                            filepath = os.path.join(IMAGES_DIR, filename)
-                            
-                            try:
-                                cv2.imwrite(filepath, image_to_save)
-                                log_with_context(logger, "debug", f"Saved snapshot: {filename}", 
-                                               self.camera_id, self.camera_name, "snapshot")
-                            except Exception as e:
-                                log_with_context(logger, "error", f"Failed to save image: {e}", 
-                                               self.camera_id, self.camera_name, "snapshot_error")
-                                filename = None
-
-                            # Log detection event
+                            # Copy: the frame buffer may be reused before the writer encodes it
+                            image_to_save = crop.copy() if crop.size > 0 else original_frame.copy()
+
+                            image_future = None
+                            if still_valid is not None and not still_valid():
+                                # The grabber reused the slot during the copy: the pixels may be another
+                                # frame's, so log the event without a snapshot rather than a wrong one
+                                log_with_context(logger, "debug", "Frame slot overwritten while copying; snapshot skipped", 
+                                               self.camera_id, self.camera_name, "ring_overrun")
+                            else:
+                                # Generate unique filename and hand encoding to the writer pool
+                                track_suffix = f"_t{track_id}" if track_id is not None else ""
+                                filename = f"{self.camera_id}{track_suffix}_{int(time.time()*1000)}.jpg"
+                                image_future = self.snapshot_writer.submit(
+                                    filename, image_to_save, latency["snapshot_write"])
+
+                            # Log detection event once the snapshot is written, without blocking this loop
                             person_id = track_id if track_id is not None else 0
-                            await self.log_detection_event(
+                            task = asyncio.create_task(self.log_detection_event(
                                 person_id=person_id,
                                 confidence=confidence,
                                 bbox=original_bbox,
-                                image_path=filename,
-                            )
+                                image_future=image_future,
+                                captured_at=captured_at,
+                            ))
+                            self._event_tasks.add(task)
+                            task.add_done_callback(self._event_tasks.discard)
+
+                        self._sync_cooldown_metrics()
+                latency["postprocess"].record(time.monotonic() - postprocess_started)
 
-                # Small delay to prevent excessive CPU usage
-                await asyncio.sleep(0.05)
+                # Pace to the camera's target rate; frames arriving meanwhile replace each other
+                if self._min_interval > 0:
+                    remaining = self._min_interval - (time.monotonic() - started)
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
 
             except Exception as e:
                 self.metrics.errors += 1
@@ -623,95 +2628,217 @@ class CameraDetector:
 class MultiCameraManager:
     """Manages multiple camera detectors with improved monitoring and metrics"""
 
-    def __init__(self):
+    def __init__(self, owned_ids: Optional[set] = None):
         self.cameras: Dict[str, CameraDetector] = {}
         self.is_running = False
         self._shutdown_event = threading.Event()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cameras_etag: Optional[str] = None
+        # Shards reconcile only the cameras the supervisor assigned them (None = all cameras)
+        self.owned_ids = owned_ids
 
-    async def load_cameras_from_db(self):
-        """Load camera configurations from database"""
+    @staticmethod
+    def select_camera_configs(cameras_data: List[dict], running_ids=()) -> List[dict]:
+        """Filter backend camera rows for detection; running cameras stay selected while marked offline"""
+        selected = []
+
+        # Optional allowlist via env: CAMERA_IDS="id1,id2"
+        allow_ids = None
+        if CAMERA_IDS:
+            allow_ids = set([s.strip() for s in CAMERA_IDS.split(",") if s.strip()])
+            log_with_context(logger, "info", f"Filtering cameras to: {allow_ids}", 
+                           event_key="camera_filter")
+
+        # Prefer online cameras first
+        def sort_key(cam):
+            return 0 if cam.get('status') == 'online' else 1
+
+        cameras_data.sort(key=sort_key)
+
+        for camera in cameras_data:
+            camera_id = camera.get('id')
+            camera_name = camera.get('name') or camera_id
+            rtsp_url = camera.get('rtsp_url') or ""
+            status = (camera.get('status') or '').lower()
+
+            if allow_ids and camera_id not in allow_ids:
+                continue
+            if not rtsp_url:
+                log_with_context(logger, "warning", f"Empty RTSP URL", 
+                               camera_id, camera_name, "config_error")
+                continue
+            # The health monitor marks stalled streams offline; that must not unload them
+            if not INCLUDE_OFFLINE and status == 'offline' and camera_id not in running_ids:
+                log_with_context(logger, "info", "Skipping offline camera (set INCLUDE_OFFLINE=true to include)", 
+                               camera_id, camera_name, "skip_offline")
+                continue
+
+            selected.append({
+                "id": camera_id,
+                "name": camera_name,
+                "rtsp_url": rtsp_url,
+                "status": status,
+                "roi": camera.get('detection_roi'),
+            })
+        return selected
+
+    @staticmethod
+    async def fetch_changed_camera_configs(etag: Optional[str] = None, 
+                                           running_ids=()) -> Tuple[Optional[List[dict]], Optional[str]]:
+        """
+        Fetch camera configurations if the list changed since etag. Returns (configs, etag);
+        configs is None when unchanged or on failure, so callers never mistake an error for
+        an empty camera list.
+        """
         try:
-            response = requests.get(f"{API_BASE_URL}/cameras", timeout=10)
-            if response.status_code == 200:
-                cameras_data = response.json()
+            status_code, cameras_data, new_etag = await ApiClient().conditional_get("/cameras", etag, timeout=10)
+            if status_code == 304:
+                return None, etag
+            if status_code == 200:
                 log_with_context(logger, "info", f"Loaded {len(cameras_data)} cameras from database", 
                                event_key="db_load")
+                return MultiCameraManager.select_camera_configs(cameras_data, running_ids), new_etag
+            log_with_context(logger, "error", f"Failed to load cameras: {status_code}", 
+                           event_key="db_error")
+        except Exception as e:
+            log_with_context(logger, "error", f"Error loading cameras: {e}", event_key="db_error")
+        return None, etag
 
-                # Optional allowlist via env: CAMERA_IDS="id1,id2"
-                allow_ids = None
-                if CAMERA_IDS:
-                    allow_ids = set([s.strip() for s in CAMERA_IDS.split(",") if s.strip()])
-                    log_with_context(logger, "info", f"Filtering cameras to: {allow_ids}", 
-                                   event_key="camera_filter")
-
-                # Prefer online cameras first
-                def sort_key(cam):
-                    return 0 if cam.get('status') == 'online' else 1
+    @staticmethod
+    async def fetch_camera_configs() -> List[dict]:
+        """Fetch camera configurations from the backend, filtered for detection"""
+        selected, _ = await MultiCameraManager.fetch_changed_camera_configs()
+        return selected or []
 
-                cameras_data.sort(key=sort_key)
+    @staticmethod
+    def _motion_sensitivities() -> Dict[str, float]:
+        """Per-camera motion sensitivity via env: MOTION_SENSITIVITY_OVERRIDES=id1=0.01,id2=0.001"""
+        sensitivities = {}
+        for pair in MOTION_SENSITIVITY_OVERRIDES.split(","):
+            camera_id, _, value = pair.partition("=")
+            if camera_id.strip() and value.strip():
+                sensitivities[camera_id.strip()] = float(value)
+        return sensitivities
+
+    def _create_detector(self, camera: dict, sensitivities: Dict[str, float]) -> CameraDetector:
+        camera_id = camera["id"]
+        detector = CameraDetector(
+            camera_id, camera["name"], camera["rtsp_url"],
+            motion_sensitivity=sensitivities.get(camera_id, MOTION_SENSITIVITY),
+            roi=camera.get("roi"),
+        )
+        self.cameras[camera_id] = detector
+        log_with_context(logger, "info", f"Added camera [status={camera['status']}]", 
+                       camera_id, camera["name"], "camera_add")
+        return detector
 
-                added = 0
-                for camera in cameras_data:
-                    camera_id = camera.get('id')
-                    camera_name = camera.get('name') or camera_id
-                    rtsp_url = camera.get('rtsp_url') or ""
-                    status = (camera.get('status') or '').lower()
+    def add_cameras(self, camera_configs: List[dict]):
+        """Create detectors for the given camera configurations"""
+        sensitivities = self._motion_sensitivities()
+        for camera in camera_configs:
+            self._create_detector(camera, sensitivities)
 
-                    if allow_ids and camera_id not in allow_ids:
-                        continue
-                    if not rtsp_url:
-                        log_with_context(logger, "warning", f"Empty RTSP URL", 
-                                       camera_id, camera_name, "config_error")
-                        continue
-                    if not INCLUDE_OFFLINE and status == 'offline':
-                        log_with_context(logger, "info", "Skipping offline camera (set INCLUDE_OFFLINE=true to include)", 
-                                       camera_id, camera_name, "skip_offline")
-                        continue
+        log_with_context(logger, "info", f"Prepared {len(camera_configs)} cameras for detection", 
+                       event_key="cameras_ready")
 
-                    detector = CameraDetector(camera_id, camera_name, rtsp_url)
-                    self.cameras[camera_id] = detector
-                    added += 1
-                    log_with_context(logger, "info", f"Added camera [status={status}]", 
-                                   camera_id, camera_name, "camera_add")
+    async def load_cameras_from_db(self):
+        """Load camera configurations from database"""
+        camera_configs, self._cameras_etag = await self.fetch_changed_camera_configs()
+        self.add_cameras(camera_configs or [])
+
+    async def _start_camera(self, detector: CameraDetector):
+        await detector.start()
+        self._tasks[detector.camera_id] = asyncio.create_task(detector.process_detections())
+
+    async def _stop_camera(self, camera_id: str):
+        detector = self.cameras.pop(camera_id)
+        await detector.stop()
+        task = self._tasks.pop(camera_id, None)
+        if task is not None:
+            # The loop exits once the closed mailbox wakes it; cancel if it is stuck elsewhere
+            try:
+                await asyncio.wait_for(task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
 
-                log_with_context(logger, "info", f"Prepared {added} cameras for detection", 
-                               event_key="cameras_ready")
-            else:
-                log_with_context(logger, "error", f"Failed to load cameras: {response.status_code}", 
-                               event_key="db_error")
+    async def adopt_camera(self, camera: dict):
+        """Start a camera the supervisor assigned to this shard while it runs"""
+        if self.owned_ids is not None:
+            self.owned_ids.add(camera["id"])
+        if camera["id"] not in self.cameras:
+            await self._start_camera(self._create_detector(camera, self._motion_sensitivities()))
+
+    async def drop_camera(self, camera_id: str):
+        """Give up a camera the supervisor removed from this shard, so it can run elsewhere later"""
+        if self.owned_ids is not None:
+            self.owned_ids.discard(camera_id)
+        if camera_id in self.cameras:
+            log_with_context(logger, "info", "Camera removed from this shard", 
+                           camera_id, self.cameras[camera_id].camera_name, "camera_remove")
+            await self._stop_camera(camera_id)
+
+    async def reconcile_cameras(self):
+        """Start, stop or restart only the cameras whose configuration changed in the backend"""
+        camera_configs, self._cameras_etag = await self.fetch_changed_camera_configs(
+            self._cameras_etag, running_ids=set(self.cameras))
+        if camera_configs is None:
+            return
 
-        except Exception as e:
-            log_with_context(logger, "error", f"Error loading cameras: {e}", event_key="db_error")
+        if self.owned_ids is not None:
+            # A removed camera stops belonging to this shard; if it comes back the supervisor
+            # assigns it afresh, possibly to another shard
+            self.owned_ids.intersection_update(camera["id"] for camera in camera_configs)
+        desired = {camera["id"]: camera for camera in camera_configs 
+                   if self.owned_ids is None or camera["id"] in self.owned_ids}
+        sensitivities = self._motion_sensitivities()
+
+        for camera_id in [camera_id for camera_id in self.cameras if camera_id not in desired]:
+            log_with_context(logger, "info", "Camera removed from configuration", 
+                           camera_id, self.cameras[camera_id].camera_name, "camera_remove")
+            await self._stop_camera(camera_id)
+
+        for camera_id, camera in desired.items():
+            detector = self.cameras.get(camera_id)
+            if detector is None:
+                await self._start_camera(self._create_detector(camera, sensitivities))
+                continue
+            if detector.rtsp_url != camera["rtsp_url"] or detector.roi != camera.get("roi"):
+                log_with_context(logger, "info", "Camera stream or detection zone changed; restarting", 
+                               camera_id, camera["name"], "camera_restart")
+                await self._stop_camera(camera_id)
+                await self._start_camera(self._create_detector(camera, sensitivities))
+            elif detector.camera_name != camera["name"]:
+                # A rename only affects labels; keep the stream and tracker running
+                detector.camera_name = detector.grabber.camera_name = detector.metrics.camera_name = camera["name"]
 
     async def start_all_cameras(self):
-        """Start detection for all cameras"""
+        """Start detection for all cameras, then keep them in sync with the backend until shutdown"""
         self.is_running = True
         log_with_context(logger, "info", "Starting all camera detectors", event_key="start_all")
 
-        # Start all camera detectors
-        for camera_id, detector in self.cameras.items():
-            await detector.start()
-
-        # Start detection processing for all cameras
-        tasks = []
-        for camera_id, detector in self.cameras.items():
-            task = asyncio.create_task(detector.process_detections())
-            tasks.append(task)
+        # Start all camera detectors and their detection processing
+        for detector in list(self.cameras.values()):
+            await self._start_camera(detector)
 
-        # Wait for all tasks to complete or shutdown signal
-        if tasks:
-            try:
-                await asyncio.gather(*tasks)
-            except asyncio.CancelledError:
-                log_with_context(logger, "info", "Detection tasks cancelled", event_key="cancel")
+        try:
+            while self.is_running and not self._shutdown_event.is_set():
+                await asyncio.sleep(CAMERA_RECONCILE_SECONDS if CAMERA_RECONCILE_SECONDS > 0 else 1)
+                if CAMERA_RECONCILE_SECONDS > 0:
+                    try:
+                        await self.reconcile_cameras()
+                    except Exception as e:
+                        log_with_context(logger, "error", f"Camera reconciliation error: {e}", 
+                                       event_key="reconcile_error")
+        except asyncio.CancelledError:
+            log_with_context(logger, "info", "Detection tasks cancelled", event_key="cancel")
 
     async def stop_all_cameras(self):
         """Stop detection for all cameras"""
         self.is_running = False
         log_with_context(logger, "info", "Stopping all cameras", event_key="stop_all")
 
-        for camera_id, detector in self.cameras.items():
-            await detector.stop()
+        for camera_id in list(self.cameras):
+            await self._stop_camera(camera_id)
 
         log_with_context(logger, "info", "All cameras stopped", event_key="stop_complete")
 
@@ -723,8 +2850,8 @@ class MultiCameraManager:
             try:
                 current_time = time.time()
                 
-                # Check each camera's health
-                for camera_id, detector in self.cameras.items():
+                # Check each camera's health (reconciliation may add or remove cameras meanwhile)
+                for camera_id, detector in list(self.cameras.items()):
                     metrics = detector.metrics
                     
                     # Check if camera is receiving frames
@@ -753,6 +2880,9 @@ class MultiCameraManager:
             "online_cameras": 0,
             "offline_cameras": 0,
             "total_frames_processed": 0,
+            "total_frames_dropped": 0,
+            "total_frames_inferred": 0,
+            "total_frames_motion_skipped": 0,
             "total_detections": 0,
             "total_events": 0,
             "total_errors": 0,
@@ -760,6 +2890,7 @@ class MultiCameraManager:
         }
         
         for camera_id, detector in self.cameras.items():
+            detector.metrics.queue_depth = len(detector.frame_mailbox)
             metrics = detector.metrics.to_dict()
             summary["cameras"][camera_id] = metrics
             
@@ -770,10 +2901,22 @@ class MultiCameraManager:
                 summary["offline_cameras"] += 1
                 
             summary["total_frames_processed"] += metrics["frames_processed"]
+            summary["total_frames_dropped"] += metrics["frames_dropped"]
+            summary["total_frames_inferred"] += metrics["frames_inferred"]
+            summary["total_frames_motion_skipped"] += metrics["frames_motion_skipped"]
             summary["total_detections"] += metrics["detections_made"]
             summary["total_events"] += metrics["events_logged"]
             summary["total_errors"] += metrics["errors"]
-        
+
+        batcher = ModelManager._batcher
+        summary["inference_queue_depth"] = batcher.queue_depth() if batcher is not None else 0
+        summary["event_spool_pending"] = EventSpool().pending()
+        summary["events_dropped"] = EventSpool().events_dropped
+        summary["events_quarantined"] = EventSpool().events_quarantined
+        grabber_hosts = GrabberHostPool._instance
+        if grabber_hosts is not None:
+            summary["grabber_restarts"] = grabber_hosts.restarts
+        summary["snapshots"] = SnapshotWriter().stats()
         return summary
 
     def handle_shutdown(self, signum, frame):
@@ -781,38 +2924,368 @@ class MultiCameraManager:
         log_with_context(logger, "info", f"Received signal {signum}, initiating shutdown", event_key="shutdown")
         self._shutdown_event.set()
 
-# ==================== MAIN FUNCTION ====================
-async def main():
-    """Enhanced main function with better error handling and metrics"""
-    log_with_context(logger, "info", "Starting Multi-Camera Detection System", event_key="startup")
-    log_with_context(logger, "info", f"Configuration: API={API_BASE_URL}, Images={IMAGES_DIR}, "
-                    f"Confidence={CONFIDENCE_THRESHOLD}, Resolution={DETECTION_WIDTH}x{DETECTION_HEIGHT}",
-                    event_key="config")
-
-    # Create manager
-    manager = MultiCameraManager()
-    
-    # Setup signal handlers
-    # signal.signal(signal.SIGINT, manager.handle_shutdown)
-    signal.signal(signal.SIGTERM, manager.handle_shutdown)
+# ==================== SHARDED MODE ====================
+def run_shard(shard_index: int, camera_configs: List[dict], metrics_queue, command_queue):
+    """Entry point of a shard worker process: runs its cameras with its own model"""
+    global EVENT_SPOOL_PATH
+    # Each shard drains its own spool so events are never delivered twice
+    EVENT_SPOOL_PATH = spool_path(shard_index)
 
+    manager = MultiCameraManager(owned_ids={camera["id"] for camera in camera_configs})
+    manager.add_cameras(camera_configs)
     try:
-        # Load cameras from database
-        await manager.load_cameras_from_db()
+        asyncio.run(run_manager(manager, metrics_queue=metrics_queue, shard_index=shard_index, 
+                                command_queue=command_queue))
+    except KeyboardInterrupt:
+        pass
+
+class ShardSupervisor:
+    """
+    Splits cameras across SHARD_PROCESSES worker processes (each loads the model once),
+    restarts shards that exit unexpectedly and aggregates their metrics.
+    """
+
+    def __init__(self, shards: int):
+        self.shards = shards
+        self._context = multiprocessing.get_context("spawn")
+        self._metrics_queue = self._context.Queue()
+        # Cameras added to a running shard; each spawn gets a fresh queue as its assignment covers the rest
+        self._command_queues: Dict[int, multiprocessing.Queue] = {}
+        self._assignments: List[List[dict]] = []
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._started_at: Dict[int, float] = {}
+        self._restart_delay: Dict[int, float] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._shard_metrics: Dict[int, dict] = {}
+        self.restarts = 0
+        self._cameras_etag: Optional[str] = None
+        self._shutdown_event = threading.Event()
 
+    def _spawn(self, shard_index: int):
+        self._command_queues[shard_index] = self._context.Queue()
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard_index, self._assignments[shard_index], self._metrics_queue, 
+                  self._command_queues[shard_index]),
+            name=f"detector-shard-{shard_index}",
+            daemon=False,
+        )
+        process.start()
+        self._processes[shard_index] = process
+        self._started_at[shard_index] = time.time()
+        log_with_context(logger, "info", 
+                       f"Started shard {shard_index} (pid={process.pid}, cameras={len(self._assignments[shard_index])})", 
+                       event_key="shard_start")
+
+    def _collect_metrics(self):
+        while True:
+            try:
+                shard_index, summary = self._metrics_queue.get_nowait()
+            except queue.Empty:
+                return
+            self._shard_metrics[shard_index] = summary
+
+    def _supervise(self):
+        """Restart shards that died, with per-shard exponential backoff"""
+        now = time.time()
+        for shard_index, process in self._processes.items():
+            if process.is_alive():
+                continue
+            if shard_index not in self._restart_at:
+                # A shard that ran for a while starts over with a short delay
+                delay = self._restart_delay.get(shard_index, 1)
+                if now - self._started_at.get(shard_index, now) > 60:
+                    delay = 1
+                self._restart_delay[shard_index] = min(delay * 2, 60)
+                self._restart_at[shard_index] = now + delay
+                log_with_context(logger, "warning", 
+                               f"Shard {shard_index} exited (code={process.exitcode}); restarting in {delay}s", 
+                               event_key="shard_crash")
+            elif now >= self._restart_at[shard_index]:
+                del self._restart_at[shard_index]
+                self.restarts += 1
+                self._spawn(shard_index)
+
+    async def _reconcile_assignments(self):
+        """
+        Keep shard assignments in line with the backend. Shards apply updates of their own
+        cameras themselves; removed cameras are dropped from their shard explicitly, and a new
+        camera goes to the least loaded shard, which starts it alongside its running cameras.
+        """
+        assigned_ids = {camera["id"] for assignment in self._assignments for camera in assignment}
+        camera_configs, self._cameras_etag = await MultiCameraManager.fetch_changed_camera_configs(
+            self._cameras_etag, running_ids=assigned_ids)
+        if camera_configs is None:
+            return
+
+        desired = {camera["id"]: camera for camera in camera_configs}
+        for shard_index, assignment in enumerate(self._assignments):
+            for camera in assignment:
+                if camera["id"] not in desired:
+                    # The shard must forget it, or a re-added camera would also restart there
+                    self._command_queues[shard_index].put(("drop", camera["id"]))
+            # Restarted shards must come back with current settings and without removed cameras
+            assignment[:] = [desired[camera["id"]] for camera in assignment if camera["id"] in desired]
+
+        for camera_id, camera in desired.items():
+            if camera_id in assigned_ids:
+                continue
+            shard_index = min(range(len(self._assignments)), key=lambda i: len(self._assignments[i]))
+            self._assignments[shard_index].append(camera)
+            # A shard waiting to be restarted picks the camera up from its assignment instead
+            self._command_queues[shard_index].put(("adopt", camera))
+            log_with_context(logger, "info", f"New camera assigned to shard {shard_index}", 
+                           camera_id, camera["name"], "camera_add")
+
+    async def run(self):
+        """Load cameras, start shards and supervise them until shutdown"""
+        camera_configs, self._cameras_etag = await MultiCameraManager.fetch_changed_camera_configs()
+        if not camera_configs:
+            log_with_context(logger, "error", "No cameras loaded. Exiting.", event_key="no_cameras")
+            await ApiClient().close()
+            return
+
+        shards = min(self.shards, len(camera_configs))
+        # Spools of shards this run will not start (fewer shards, or unsharded before) move to shard 0
+        adopt_orphaned_spools(shards)
+        self._assignments = [camera_configs[i::shards] for i in range(shards)]
+        for shard_index in range(shards):
+            self._spawn(shard_index)
+
+        # Per-camera metrics here are as fresh as the last shard report (SHARD_METRICS_INTERVAL)
+        exporter = MetricsExporter(self.get_metrics_summary)
+        await exporter.start()
+
+        reconcile_at = time.monotonic() + CAMERA_RECONCILE_SECONDS
+        try:
+            while not self._shutdown_event.is_set():
+                await asyncio.sleep(1)
+                self._collect_metrics()
+                self._supervise()
+                if CAMERA_RECONCILE_SECONDS > 0 and time.monotonic() >= reconcile_at:
+                    reconcile_at = time.monotonic() + CAMERA_RECONCILE_SECONDS
+                    try:
+                        await self._reconcile_assignments()
+                    except Exception as e:
+                        log_with_context(logger, "error", f"Camera reconciliation error: {e}", 
+                                       event_key="reconcile_error")
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            log_with_context(logger, "info", "Supervisor interrupted", event_key="interrupt")
+        finally:
+            await exporter.stop()
+            await asyncio.to_thread(self.stop)
+            self._collect_metrics()
+            await ApiClient().close()
+            log_with_context(logger, "info", f"Final metrics: {self.get_metrics_summary()}", event_key="final_metrics")
+
+    def stop(self, timeout: float = 30.0):
+        """Ask every shard to shut down cleanly, killing any that do not exit in time"""
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for shard_index, process in self._processes.items():
+            process.join(timeout=timeout)
+            if process.is_alive():
+                log_with_context(logger, "warning", f"Shard {shard_index} did not stop; killing", event_key="shard_stop")
+                process.kill()
+                process.join()
+
+    def get_metrics_summary(self) -> dict:
+        """Aggregate the latest metrics reported by every shard"""
+        summary = {"shards": len(self._processes), "shard_restarts": self.restarts, "cameras": {}}
+        for shard_summary in self._shard_metrics.values():
+            for key, value in shard_summary.items():
+                if key == "cameras":
+                    summary["cameras"].update(value)
+                elif isinstance(value, dict):
+                    totals = summary.setdefault(key, {})
+                    for sub_key, sub_value in value.items():
+                        totals[sub_key] = totals.get(sub_key, 0) + sub_value
+                elif isinstance(value, (int, float)):
+                    summary[key] = summary.get(key, 0) + value
+        return summary
+
+    def handle_shutdown(self, signum, frame):
+        """Handle shutdown signals gracefully"""
+        log_with_context(logger, "info", f"Received signal {signum}, stopping shards", event_key="shutdown")
+        self._shutdown_event.set()
+
+# ==================== PROMETHEUS EXPORTER ====================
+# (summary key, metric name, type, help) for each camera's entry in get_metrics_summary()["cameras"]
+CAMERA_PROMETHEUS_METRICS = [
+    ("frames_processed", "detector_frames_grabbed_total", "counter", "Frames decoded from the camera stream"),
+    ("frames_inferred", "detector_frames_inferred_total", "counter", "Frames sent through the detection model"),
+    ("frames_dropped", "detector_frames_dropped_total", "counter", "Frames replaced before inference took them"),
+    ("frames_motion_skipped", "detector_frames_motion_skipped_total", "counter", "Frames skipped by the motion gate"),
+    ("fps_grabbed", "detector_grabbed_fps", "gauge", "Frames grabbed per second over the rolling window"),
+    ("fps_inferred", "detector_inferred_fps", "gauge", "Frames inferred per second over the rolling window"),
+    ("queue_depth", "detector_frame_queue_depth", "gauge", "Frames waiting for this camera's inference"),
+    ("frame_stride", "detector_frame_stride", "gauge", "Current effective frame stride"),
+    ("reduced_decode", "detector_reduced_decode", "gauge", "1 while the camera decodes only keyframes"),
+    ("detections_made", "detector_detections_total", "counter", "Person detections above the confidence threshold"),
+    ("events_logged", "detector_events_posted_total", "counter", "Events acknowledged by the backend"),
+    ("events_failed", "detector_events_failed_total", "counter", "Events in failed or rejected backend posts"),
+    ("reconnects", "detector_reconnects_total", "counter", "Stream reconnection attempts"),
+    ("errors", "detector_errors_total", "counter", "Grabber and processing errors"),
+    ("online", "detector_camera_online", "gauge", "1 when the camera is online"),
+]
+
+# (summary key, metric name, type, help) for process-wide values
+PROCESS_PROMETHEUS_METRICS = [
+    ("inference_queue_depth", "detector_inference_queue_depth", "gauge", "Frames waiting for an inference batch"),
+    ("event_spool_pending", "detector_event_spool_pending", "gauge", "Events spooled and not yet delivered"),
+    ("events_dropped", "detector_events_dropped_total", "counter", "Events shed from the spool during an outage"),
+    ("events_quarantined", "detector_events_quarantined_total", "counter", "Events the backend refused, kept in the spool's quarantine table"),
+    ("shard_restarts", "detector_shard_restarts_total", "counter", "Shard processes restarted by the supervisor"),
+    ("grabber_restarts", "detector_grabber_restarts_total", "counter", "Grabber host processes respawned after exiting"),
+]
+
+def _prometheus_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _prometheus_value(value) -> str:
+    """Exact sample value: counters and integral gauges as integers, other floats at full precision"""
+    value = value or 0
+    if isinstance(value, (bool, int)):
+        return str(int(value))
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def render_prometheus_metrics(summary: dict) -> str:
+    """Render a get_metrics_summary() dict in the Prometheus text exposition format"""
+    lines = []
+    cameras = summary.get("cameras", {})
+    for key, name, metric_type, help_text in CAMERA_PROMETHEUS_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for camera_id, metrics in cameras.items():
+            value = 1 if key == "online" and metrics.get("status") == "online" else metrics.get(key, 0)
+            labels = f'camera_id="{_prometheus_label(camera_id)}",camera_name="{_prometheus_label(metrics.get("camera_name", ""))}"'
+            lines.append(f"{name}{{{labels}}} {_prometheus_value(value)}")
+    name = "detector_stage_latency_seconds"
+    lines.append(f"# HELP {name} Pipeline stage latency over the recent window (end_to_end: capture to backend ack)")
+    lines.append(f"# TYPE {name} summary")
+    for camera_id, metrics in cameras.items():
+        camera_labels = f'camera_id="{_prometheus_label(camera_id)}",camera_name="{_prometheus_label(metrics.get("camera_name", ""))}"'
+        for stage, stage_summary in metrics.get("latency_ms", {}).items():
+            labels = f'{camera_labels},stage="{stage}"'
+            for key, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} {_prometheus_value(stage_summary[key] / 1000)}')
+            lines.append(f"{name}_count{{{labels}}} {_prometheus_value(stage_summary['count'])}")
+    for key, name, metric_type, help_text in PROCESS_PROMETHEUS_METRICS:
+        if key in summary:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {_prometheus_value(summary[key])}")
+    for key, value in summary.get("snapshots", {}).items():
+        name, metric_type = (f"detector_snapshots_{key}", "gauge") if key == "backlog" else (f"detector_snapshots_{key}_total", "counter")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {_prometheus_value(value)}")
+    return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Serves GET /metrics (Prometheus text format) from a metrics summary provider"""
+
+    def __init__(self, summary_provider, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.summary_provider = summary_provider
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        body = render_prometheus_metrics(self.summary_provider())
+        return web.Response(text=body, content_type="text/plain", charset="utf-8",
+                            headers={"Cache-Control": "no-cache"})
+
+    async def start(self):
+        """Start serving in the running loop (no-op when METRICS_PORT is 0)"""
+        if not self.port or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            log_with_context(logger, "error", f"Metrics endpoint unavailable on {self.host}:{self.port}: {e}", 
+                           event_key="metrics_exporter")
+            await self._runner.cleanup()
+            self._runner = None
+            return
+        log_with_context(logger, "info", f"Serving metrics on http://{self.host}:{self.port}/metrics", 
+                       event_key="metrics_exporter")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+# ==================== MAIN FUNCTION ====================
+async def report_shard_metrics(manager: MultiCameraManager, metrics_queue, shard_index: int):
+    """Periodically send this shard's metrics to the supervising process"""
+    while True:
+        await asyncio.sleep(SHARD_METRICS_INTERVAL)
+        metrics_queue.put_nowait((shard_index, manager.get_metrics_summary()))
+
+async def receive_shard_commands(manager: MultiCameraManager, command_queue):
+    """Apply the supervisor's ("adopt", camera) and ("drop", camera_id) commands without restarting"""
+    while True:
+        await asyncio.sleep(1)
+        while True:
+            try:
+                action, payload = command_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if action == "adopt":
+                    await manager.adopt_camera(payload)
+                elif action == "drop":
+                    await manager.drop_camera(payload)
+            except Exception as e:
+                camera_id = payload["id"] if action == "adopt" else payload
+                log_with_context(logger, "error", f"Failed to {action} camera: {e}", 
+                               camera_id, event_key=f"camera_{action}")
+
+async def run_manager(manager: MultiCameraManager, metrics_queue=None, shard_index: Optional[int] = None, 
+                      command_queue=None):
+    """Run the manager's cameras until shutdown, then clean up (single-process mode and shards)"""
+    main_task = asyncio.current_task()
+    exporter = MetricsExporter(manager.get_metrics_summary)
+    if shard_index is not None:
+        # The supervisor stops shards with SIGTERM; turn it into a clean cancellation
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+
+    try:
         if not manager.cameras:
             log_with_context(logger, "error", "No cameras loaded. Exiting.", event_key="no_cameras")
             return
 
+        # Replay events spooled by a previous run
+        EventSpool().start()
+
+        # Shards report to the supervisor, which serves the aggregated metrics
+        if shard_index is None:
+            await exporter.start()
+
         # Start health monitoring
         health_task = asyncio.create_task(manager.monitor_health())
 
         # Start all cameras
         detection_task = asyncio.create_task(manager.start_all_cameras())
+        tasks = [health_task, detection_task]
+        if metrics_queue is not None:
+            tasks.append(asyncio.create_task(report_shard_metrics(manager, metrics_queue, shard_index)))
+        if command_queue is not None:
+            tasks.append(asyncio.create_task(receive_shard_commands(manager, command_queue)))
 
         # Wait for tasks to complete or shutdown signal
         done, pending = await asyncio.wait(
-            [health_task, detection_task],
+            tasks,
             return_when=asyncio.FIRST_EXCEPTION
         )
         
@@ -824,19 +3297,61 @@ async def main():
             except asyncio.CancelledError:
                 pass
 
-    except KeyboardInterrupt:
-        log_with_context(logger, "info", "Received keyboard interrupt", event_key="interrupt")
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        log_with_context(logger, "info", "Received shutdown request", event_key="interrupt")
     except Exception as e:
         log_with_context(logger, "error", f"Unexpected error: {e}", event_key="fatal_error")
     finally:
         # Cleanup
+        await exporter.stop()
         await manager.stop_all_cameras()
+        if GRABBER_PROCESSES > 0:
+            GrabberHostPool().shutdown()
+        ModelManager().shutdown()
+        SnapshotWriter().stop()
+        await EventSpool().stop()
+        await ApiClient().close()
         
         # Log final metrics
         metrics = manager.get_metrics_summary()
+        if metrics_queue is not None:
+            metrics_queue.put_nowait((shard_index, metrics))
         log_with_context(logger, "info", f"Final metrics: {metrics}", event_key="final_metrics")
         
         log_with_context(logger, "info", "Multi-Camera Detection System stopped", event_key="shutdown_complete")
 
+async def main():
+    """Enhanced main function with better error handling and metrics"""
+    log_with_context(logger, "info", "Starting Multi-Camera Detection System", event_key="startup")
+    log_with_context(logger, "info", f"Configuration: API={API_BASE_URL}, Images={IMAGES_DIR}, "
+                    f"Confidence={CONFIDENCE_THRESHOLD}, Resolution={DETECTION_WIDTH}x{DETECTION_HEIGHT}, "
+                    f"InferenceWorkers={INFERENCE_WORKERS}, Batch={INFERENCE_BATCH_SIZE}/{INFERENCE_BATCH_WAIT_MS:.0f}ms, "
+                    f"Shards={SHARD_PROCESSES}, Backend={INFERENCE_BACKEND}/{MODEL_PRECISION}",
+                    event_key="config")
+
+    if INFERENCE_BACKEND in ("onnxruntime", "openvino"):
+        # Export once here so shards never race to write the same artifact
+        resolve_model_artifact(INFERENCE_BACKEND)
+
+    if SHARD_PROCESSES > 1:
+        supervisor = ShardSupervisor(SHARD_PROCESSES)
+        signal.signal(signal.SIGTERM, supervisor.handle_shutdown)
+        await supervisor.run()
+        return
+
+    # Create manager
+    manager = MultiCameraManager()
+    
+    # Setup signal handlers
+    # signal.signal(signal.SIGINT, manager.handle_shutdown)
+    signal.signal(signal.SIGTERM, manager.handle_shutdown)
+
+    # Events spooled by an earlier sharded run are delivered from this process's spool
+    adopt_orphaned_spools(1)
+
+    # Load cameras from database
+    await manager.load_cameras_from_db()
+    await run_manager(manager)
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Detector INT8 Quantization Script
+Samples frames from our own cameras, builds the INT8 detector model calibrated on them
+and reports person recall/precision against FP32 plus frames per second per core
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.utils import ops
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "detection_integration"))
+
+import multi_camera_detector as detector  # noqa: E402
+
+async def load_camera_configs():
+    """Fetch the cameras the detector would monitor (honours CAMERA_IDS / INCLUDE_OFFLINE)"""
+    try:
+        return await detector.MultiCameraManager.fetch_camera_configs()
+    finally:
+        await detector.ApiClient().close()
+
+def sample_calibration_frames(camera_configs: List[dict], frames_per_camera: int, 
+                              interval: float) -> List[np.ndarray]:
+    """Grab letterboxed frames from each camera, spaced interval seconds apart"""
+    letterboxer = detector.Letterboxer(detector.DETECTION_WIDTH, detector.DETECTION_HEIGHT)
+    frames = []
+    for config in camera_configs:
+        cap = cv2.VideoCapture(config['rtsp_url'])
+        collected, next_at = 0, 0.0
+        deadline = time.monotonic() + frames_per_camera * interval + 30
+        try:
+            while collected < frames_per_camera and time.monotonic() < deadline and cap.grab():
+                if time.monotonic() < next_at:
+                    continue
+                ret, frame = cap.retrieve()
+                if not ret:
+                    continue
+                # Canvases are never released, so each sample keeps its own buffer
+                frames.append(letterboxer.letterbox(frame)[0])
+                collected += 1
+                next_at = time.monotonic() + interval
+        finally:
+            cap.release()
+        detector.log_with_context(detector.logger, "info", f"Sampled {collected} calibration frames", 
+                       config['id'], config['name'], "calibration")
+    return frames
+
+def quantize_model(calibration_frames: List[np.ndarray]) -> str:
+    """Build the INT8 (QDQ) model from the FP32 ONNX export, calibrated on our own frames"""
+    try:
+        from onnxruntime import quantization
+    except ImportError as e:
+        raise RuntimeError("INT8 quantization requires the onnxruntime package") from e
+    import onnx
+
+    source = detector.ensure_exported_model("onnxruntime")
+    target = detector.exported_model_path("onnxruntime", "int8")
+    model = onnx.load(source)
+    input_name = model.graph.input[0].name
+    tensorizer = detector.FrameTensorizer(detector.DETECTION_HEIGHT, detector.DETECTION_WIDTH, 1)
+
+    class FrameReader(quantization.CalibrationDataReader):
+        def __init__(self):
+            self._frames = iter(calibration_frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            return None if frame is None else {input_name: tensorizer([frame]).numpy().copy()}
+
+    # Keep the detect head (last top-level module) in FP32: box regression loses the most when quantized
+    indices = [int(node.name.split("/")[1].split(".")[1]) for node in model.graph.node 
+               if node.name.startswith("/model.")]
+    head = f"/model.{max(indices)}/" if indices else None
+    excluded = [node.name for node in model.graph.node if head and node.name.startswith(head)]
+
+    partial_path = target + ".partial"
+    quantization.quantize_static(
+        source, partial_path, FrameReader(),
+        quant_format=quantization.QuantFormat.QDQ,
+        activation_type=quantization.QuantType.QUInt8,
+        weight_type=quantization.QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=excluded,
+    )
+    # Carry the class names and other export metadata over to the quantized model
+    quantized = onnx.load(partial_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(model.metadata_props)
+    onnx.save(quantized, partial_path)
+    os.replace(partial_path, target)
+    detector.log_with_context(detector.logger, "info", 
+                   f"INT8 model written to {target} ({len(calibration_frames)} calibration frames, "
+                   f"{len(excluded)} head nodes kept in FP32)", event_key="quantize")
+    return target
+
+def detect_people(backend: "detector.InferenceBackend", frames: List[np.ndarray]) -> List[np.ndarray]:
+    """Person boxes (x1, y1, x2, y2) above CONFIDENCE_THRESHOLD for each frame"""
+    tensorizer = detector.FrameTensorizer(detector.DETECTION_HEIGHT, detector.DETECTION_WIDTH, 1)
+    people = []
+    for frame in frames:
+        with torch.inference_mode():
+            detections = ops.non_max_suppression(
+                backend.forward(tensorizer([frame])), detector.CONFIDENCE_THRESHOLD, detector.NMS_IOU, classes=[0]
+            )[0]
+        people.append(detections[:, :4].numpy())
+    return people
+
+def match_people(reference: np.ndarray, candidate: np.ndarray, iou_threshold: float = 0.5) -> Tuple[int, int, int]:
+    """Greedy IoU matching of one frame's boxes; returns (true positives, false positives, misses)"""
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0, len(candidate), len(reference)
+    top_left = np.maximum(reference[:, None, :2], candidate[None, :, :2])
+    bottom_right = np.minimum(reference[:, None, 2:], candidate[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    areas_ref = np.prod(reference[:, 2:] - reference[:, :2], axis=1)
+    areas_cand = np.prod(candidate[:, 2:] - candidate[:, :2], axis=1)
+    iou = intersection / (areas_ref[:, None] + areas_cand[None, :] - intersection + 1e-9)
+    matched = 0
+    while iou.size and iou.max() >= iou_threshold:
+        r, c = np.unravel_index(np.argmax(iou), iou.shape)
+        iou[r, :] = -1
+        iou[:, c] = -1
+        matched += 1
+    return matched, len(candidate) - matched, len(reference) - matched
+
+def measure_throughput(backend: "detector.InferenceBackend", frames: List[np.ndarray], seconds: float) -> float:
+    """Frames per second for batched forward passes plus NMS over the sample frames"""
+    batch_size = detector.INFERENCE_BATCH_SIZE
+    tensorizer = detector.FrameTensorizer(detector.DETECTION_HEIGHT, detector.DETECTION_WIDTH, batch_size)
+    batches = [frames[i:i + batch_size] for i in range(0, len(frames), batch_size)]
+    processed, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for batch in batches:
+            with torch.inference_mode():
+                ops.non_max_suppression(backend.forward(tensorizer(batch)), detector.NMS_CONFIDENCE, detector.NMS_IOU)
+            processed += len(batch)
+    return processed / (time.perf_counter() - started)
+
+def compare_precisions(backend_name: str, frames: List[np.ndarray], seconds: float = 20.0) -> dict:
+    """Person recall/precision of the INT8 model against FP32, and throughput per core for both"""
+    threads = max(1, (os.cpu_count() or 1) // detector.SHARD_PROCESSES)
+    backend_cls = detector.INFERENCE_BACKENDS[backend_name]
+    reference = backend_cls(threads, detector.ensure_exported_model(backend_name))
+    candidate = backend_cls(threads, detector.exported_model_path(backend_name, "int8"))
+
+    true_positives = false_positives = misses = 0
+    for expected, found in zip(detect_people(reference, frames), detect_people(candidate, frames)):
+        tp, fp, fn = match_people(expected, found)
+        true_positives += tp
+        false_positives += fp
+        misses += fn
+
+    fp32_fps = measure_throughput(reference, frames, seconds)
+    int8_fps = measure_throughput(candidate, frames, seconds)
+    return {
+        "backend": backend_name,
+        "frames": len(frames),
+        "fp32_people": true_positives + misses,
+        "person_recall": round(true_positives / max(true_positives + misses, 1), 4),
+        "person_precision": round(true_positives / max(true_positives + false_positives, 1), 4),
+        "threads": threads,
+        "fp32_fps_per_core": round(fp32_fps / threads, 2),
+        "int8_fps_per_core": round(int8_fps / threads, 2),
+        "speedup": round(int8_fps / max(fp32_fps, 1e-9), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Detector INT8 Quantization Tool")
+    parser.add_argument("--backend", default=None, choices=["onnxruntime", "openvino"],
+                        help="Runtime to benchmark (default: INFERENCE_BACKEND, or onnxruntime)")
+    parser.add_argument("--frames-per-camera", type=int, default=40, help="Frames sampled from each camera")
+    parser.add_argument("--interval", type=float, default=3.0, help="Seconds between sampled frames")
+    parser.add_argument("--eval-fraction", type=float, default=0.3,
+                        help="Share of sampled frames held out of calibration for the report")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Throughput measurement time per model")
+    parser.add_argument("--report-only", action="store_true", help="Skip quantization and re-run the report")
+
+    args = parser.parse_args()
+    backend = args.backend or (detector.INFERENCE_BACKEND if detector.INFERENCE_BACKEND != "pytorch" else "onnxruntime")
+
+    print("🔧 Detector INT8 Quantization")
+    print("=" * 50)
+
+    cameras = asyncio.run(load_camera_configs())
+    if not cameras:
+        print("❌ No cameras available to sample frames from")
+        return 1
+
+    print(f"\n📷 Sampling {args.frames_per_camera} frames from {len(cameras)} cameras...")
+    frames = sample_calibration_frames(cameras, args.frames_per_camera, args.interval)
+    if len(frames) < 2:
+        print("❌ Not enough frames sampled")
+        return 1
+
+    # Fixed seed so re-runs calibrate and evaluate on comparable splits
+    random.Random(0).shuffle(frames)
+    held_out = max(1, int(len(frames) * args.eval_fraction))
+    evaluation, calibration = frames[:held_out], frames[held_out:]
+
+    if not args.report_only:
+        print(f"\n⚙️  Calibrating on {len(calibration)} frames...")
+        path = quantize_model(calibration)
+        print(f"✅ INT8 model: {path}")
+
+    print(f"\n📊 Comparing FP32 and INT8 on {len(evaluation)} held-out frames ({backend})...")
+    report = compare_precisions(backend, evaluation, args.seconds)
+    print(json.dumps(report, indent=2))
+
+    report_path = os.path.splitext(detector.exported_model_path(backend, "int8"))[0] + "_report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Report saved to {report_path}")
+    print("Set MODEL_PRECISION=int8 to run cameras on the quantized model")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
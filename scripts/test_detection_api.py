@@ -504,6 +504,48 @@ def test_create_event():
     )
     print(r.status_code, r.text)
 
+def test_create_event_batch():
+    camera_id = "343d0b60-3493-4187-8ad2-6dd06a7ca74f"  # use a real one
+    payload = [
+        {
+            "timestamp": datetime.now().isoformat(),
+            "person_id": 40 + i,
+            "confidence": 0.8 + i * 0.05,
+            "camera_id": camera_id,
+            "camera_name": "Lobby",
+            "alert_sent": False,
+            "metadata": {"model": "yolov8n", "notes": f"batch test {i}"}
+        }
+        for i in range(3)
+    ]
+    r = requests.post(
+        f"{API_BASE_URL}/events/batch",
+        json=payload,
+        headers={"X-API-Key": API_KEY},
+        timeout=10,
+    )
+    print(r.status_code, r.text)
+
+def test_update_camera_roi():
+    camera_id = "343d0b60-3493-4187-8ad2-6dd06a7ca74f"  # use a real one
+    # Rectangle in 0-1 frame coordinates; a list of [x, y] points sets a polygon, null clears it
+    payload = {"roi": {"x": 0.25, "y": 0.1, "width": 0.5, "height": 0.8}}
+    r = requests.put(
+        f"{API_BASE_URL}/cameras/{camera_id}/roi",
+        json=payload,
+        headers={"X-API-Key": API_KEY},
+        timeout=5,
+    )
+    print(r.status_code, r.text)
+
+def test_cameras_etag():
+    # The detector polls the camera list with If-None-Match; an unchanged list answers 304
+    r = requests.get(f"{API_BASE_URL}/cameras", timeout=5)
+    etag = r.headers.get("ETag")
+    print(r.status_code, etag)
+    r = requests.get(f"{API_BASE_URL}/cameras", headers={"If-None-Match": etag}, timeout=5)
+    print(r.status_code, "(expected 304)")
+
 if __name__ == "__main__":
     # main()
     test_create_event()
\ No newline at end of file